@@ -65,6 +65,7 @@ def build_profile(
             writer.writerows(codelist)
 
     builder = ProfileBuilder(standard_tag, extension_versions, registry_base_url, standard_base_url, schema_base_url)
+    builder.prefetch()
     extension_codelists = builder.extension_codelists()
     directories_and_schemas = {
         "profile": {
@@ -0,0 +1,246 @@
+"""
+Cache backends for the HTTP session that is shared by this package's classes.
+
+By default, responses are cached in memory. To cache responses across processes, set the ``REQUESTS_CACHE_BACKEND``
+environment variable to ``sqlite`` or ``filesystem``, or call :func:`ocdsextensionregistry.util.configure_session`.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import suppress
+
+from requests_cache.backends import BaseCache, BaseStorage, FileCache, SQLiteCache, init_backend
+
+
+class LRUStorage(BaseStorage):
+    """
+    Wrap a backend's storage of responses, and evict the least recently used responses once the total size of their
+    bodies or the number of responses exceeds a maximum.
+
+    If neither maximum is set, the responses in persistent storage aren't indexed, and :attr:`size` counts only the
+    responses written by this process.
+    """
+
+    def __init__(self, storage, max_bytes=None, max_entries=None, index=None):
+        """
+        :param storage: the backend's storage of responses
+        :param int max_bytes: the maximum total size of the responses' bodies, in bytes
+        :param int max_entries: the maximum number of responses
+        :param index: a persistent index of the responses' sizes and access times, to not read the responses in
+            persistent storage
+        """
+        super().__init__()
+        # BaseCache.create_key() reads the serializer of the storage of responses.
+        self.serializer = storage.serializer
+        self.storage = storage
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        #: The total size of the responses' bodies, in bytes.
+        self.size = 0
+
+        self._lock = threading.RLock()
+        self._sizes = OrderedDict()
+        self._persistent_index = None
+
+        if max_bytes is None and max_entries is None:
+            return
+
+        self._persistent_index = index
+        if index is None:
+            # Read the responses in persistent storage, in the order in which they were written (SQLite's order).
+            for key in list(storage):
+                with suppress(KeyError):
+                    self._index(key, storage[key])
+            return
+
+        # Index the responses in persistent storage, from least to most recently used, without reading them.
+        keys = set(storage)
+        stale = []
+        for key, size in index.items():
+            if key in keys:
+                keys.remove(key)
+                self._sizes[key] = size
+                self.size += size
+            else:
+                stale.append(key)
+        index.delete(stale)
+        # Read the responses that were written while no maximum was set.
+        for key in keys:
+            with suppress(KeyError):
+                self._index(key, storage[key])
+        self._evict()
+
+    def __getitem__(self, key):
+        with self._lock:
+            value = self.storage[key]
+            if key in self._sizes:
+                self._sizes.move_to_end(key)
+                if self._persistent_index is not None:
+                    self._persistent_index.touch(key)
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            size = _size(value)
+            if self.max_bytes is not None and size > self.max_bytes:
+                with suppress(KeyError):
+                    del self[key]
+                return
+
+            self.storage[key] = value
+            self._index(key, value)
+            self._evict()
+
+    def __delitem__(self, key):
+        with self._lock:
+            self.size -= self._sizes.pop(key, 0)
+            if self._persistent_index is not None:
+                self._persistent_index.delete([key])
+            del self.storage[key]
+
+    def __contains__(self, key):
+        return key in self.storage
+
+    def __iter__(self):
+        yield from self.storage
+
+    def __len__(self):
+        return len(self.storage)
+
+    def clear(self):
+        with self._lock:
+            self.storage.clear()
+            self._sizes.clear()
+            self.size = 0
+            if self._persistent_index is not None:
+                self._persistent_index.clear()
+
+    def close(self):
+        self.storage.close()
+        if self._persistent_index is not None:
+            self._persistent_index.close()
+
+    def _index(self, key, value):
+        self.size -= self._sizes.pop(key, 0)
+        self._sizes[key] = _size(value)
+        self.size += self._sizes[key]
+        if self._persistent_index is not None:
+            self._persistent_index.set(key, self._sizes[key])
+
+    def _evict(self):
+        evicted = []
+        while self._sizes and (
+            (self.max_bytes is not None and self.size > self.max_bytes)
+            or (self.max_entries is not None and len(self._sizes) > self.max_entries)
+        ):
+            key, size = self._sizes.popitem(last=False)
+            self.size -= size
+            evicted.append(key)
+            with suppress(KeyError):
+                del self.storage[key]
+        if evicted and self._persistent_index is not None:
+            self._persistent_index.delete(evicted)
+
+
+class _SQLiteIndex:
+    # Store the sizes and access times of responses in a SQLite table, so that other processes can evict the least
+    # recently used responses without reading every response.
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connect()
+
+    def items(self):
+        with self._lock:
+            return self._connection.execute("SELECT key, size FROM lru_index ORDER BY accessed").fetchall()
+
+    def set(self, key, size):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO lru_index (key, size, accessed) VALUES (?, ?, ?)",
+                (key, size, time.time()),
+            )
+
+    def touch(self, key):
+        with self._lock:
+            self._connection.execute("UPDATE lru_index SET accessed = ? WHERE key = ?", (time.time(), key))
+
+    def delete(self, keys):
+        with self._lock:
+            self._connection.executemany("DELETE FROM lru_index WHERE key = ?", [(key,) for key in keys])
+
+    def clear(self):
+        # The filesystem backend removes its cache directory, including this database, so reconnect.
+        with self._lock:
+            self._connection.close()
+            self._connect()
+            self._connection.execute("DELETE FROM lru_index")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _connect(self):
+        self._connection = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS lru_index (key TEXT PRIMARY KEY, size INTEGER, accessed REAL)"
+        )
+
+
+class LRUCache(BaseCache):
+    """
+    Wrap a cache backend, limit the total size of its responses' bodies and the number of its responses, and count
+    cache hits and misses.
+    """
+
+    def __init__(self, cache_name="http_cache", *, backend="memory", max_bytes=None, max_entries=None, **kwargs):
+        """
+        :param str cache_name: the cache's name, database path or directory, depending on the backend
+        :param str backend: the `requests-cache backend
+            <https://requests-cache.readthedocs.io/en/stable/user_guide/backends.html>`__, like ``'sqlite'``
+        :param int max_bytes: the maximum total size of the responses' bodies, in bytes
+        :param int max_entries: the maximum number of responses
+        :param kwargs: the backend's keyword arguments
+        """
+        #: The wrapped backend.
+        self.backend = init_backend(cache_name, backend, **kwargs)
+        super().__init__(cache_name=self.backend.cache_name)
+        index = None
+        if max_bytes is not None or max_entries is not None:
+            # The memory backend's storage isn't persistent. (An in-memory SQLite database has a ":memory:" path.)
+            if isinstance(self.backend, SQLiteCache) and ":memory:" not in str(self.backend.responses.db_path):
+                index = _SQLiteIndex(self.backend.responses.db_path)
+            elif isinstance(self.backend, FileCache):
+                index = _SQLiteIndex(self.backend.cache_dir / "lru_index.sqlite")
+        self.responses = LRUStorage(self.backend.responses, max_bytes, max_entries, index)
+        self.redirects = self.backend.redirects
+        #: The number of lookups that found a response.
+        self.hits = 0
+        #: The number of lookups that found no response.
+        self.misses = 0
+
+        self._lock = threading.Lock()
+
+    def clear(self):
+        self.responses.clear()
+        # The filesystem backend removes its cache directory, including the database of redirects.
+        if isinstance(self.backend, FileCache):
+            self.redirects.init_db()
+        else:
+            self.redirects.clear()
+
+    def get_response(self, key, default=None):
+        response = super().get_response(key, default)
+        with self._lock:
+            # bool(response) is False if the status code is 400 or more.
+            if response is default:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return response
+
+
+def _size(value):
+    return len(getattr(value, "content", None) or b"")
@@ -21,7 +21,12 @@ class BaseCommand:
         raise NotImplementedError("commands must implement handle()")
 
     def versions(self):
-        registry = ExtensionRegistry(self.args.extension_versions_url, self.args.extensions_url)
+        if self.args.registry_snapshot:
+            registry = ExtensionRegistry.load(
+                self.args.registry_snapshot, self.args.extension_versions_url, self.args.extensions_url
+            )
+        else:
+            registry = ExtensionRegistry(self.args.extension_versions_url, self.args.extensions_url)
 
         versions = defaultdict(list)
         for value in self.args.versions:
@@ -2,6 +2,7 @@ import gettext
 import logging
 import os
 import sys
+from collections import defaultdict
 from pathlib import Path
 from urllib.parse import urlsplit
 
@@ -15,8 +16,8 @@ from ocds_babel.translate import (
 
 from ocdsextensionregistry import EXTENSION_VERSIONS_DATA, EXTENSIONS_DATA
 from ocdsextensionregistry.commands.base import BaseCommand
-from ocdsextensionregistry.exceptions import CommandError
-from ocdsextensionregistry.util import DEFAULT_MINOR_VERSION, json_dump, session
+from ocdsextensionregistry.exceptions import CommandError, UnknownLatestVersion
+from ocdsextensionregistry.util import get_latest_version, json_dump, session
 
 logger = logging.getLogger("ocdsextensionregistry")
 
@@ -48,6 +49,7 @@ class Command(BaseCommand):
             default=EXTENSION_VERSIONS_DATA,
             help="the URL of the registry's extension_versions.csv",
         )
+        self.add_argument("--registry-snapshot", help="a file in which to cache the parsed registry")
 
     def handle(self):
         if self.args.languages and not self.args.locale_dir:
@@ -57,6 +59,7 @@ class Command(BaseCommand):
             versions_directory = Path(self.args.versions_dir)
 
         data = {}
+        versions = defaultdict(list)
         languages = {"en"}
         localedir = self.args.locale_dir
         headers = ["Title", "Description", "Extension"]
@@ -73,6 +76,7 @@ class Command(BaseCommand):
                 languages.update(available_translations)
 
         for version in self.versions():
+            versions[version.id].append(version)
             public_download_url = version.download_url
             if self.args.versions_dir:
                 version.download_url = (versions_directory / version.id / version.version).as_uri()
@@ -155,20 +159,10 @@ class Command(BaseCommand):
             data[version.id]["versions"][version.version] = version_data
 
         for version_id, value in data.items():
-            # Determine the latest version. See ocdsextensionregistry.util.get_latest_version().
-            versions = value["versions"]
-            if len(versions) == 1:
-                latest_version = next(iter(versions))
-            elif "master" in versions:
-                latest_version = "master"
-            elif DEFAULT_MINOR_VERSION in versions:
-                latest_version = DEFAULT_MINOR_VERSION
-            else:
-                dated = [kv for kv in versions.items() if kv[1]["date"]]
-                if dated:
-                    latest_version = max(dated, key=lambda kv: kv[1]["date"])[0]
-                else:
-                    raise CommandError(f"Couldn't determine latest version of {version_id}")
+            try:
+                latest_version = get_latest_version(versions[version_id]).version
+            except UnknownLatestVersion as e:
+                raise CommandError(f"Couldn't determine latest version of {version_id}") from e
 
             # Apply the latest version.
             value["latest_version"] = latest_version
@@ -44,6 +44,7 @@ class Command(BaseCommand):
             default=EXTENSION_VERSIONS_DATA,
             help="the URL of the registry's extension_versions.csv",
         )
+        self.add_argument("--registry-snapshot", help="a file in which to cache the parsed registry")
 
     def handle(self):
         output_directory = Path(self.args.output_directory)
@@ -22,6 +22,10 @@ class UnsupportedSchemeError(OCDSExtensionRegistryError):
     """Raised if a URI scheme is unsupported."""
 
 
+class UnsupportedSnapshotError(OCDSExtensionRegistryError):
+    """Raised if a registry snapshot is in an unsupported format."""
+
+
 class CommandError(OCDSExtensionRegistryError):
     """Errors from within this package's CLI."""
 
@@ -1,4 +1,6 @@
 class Extension:
+    __slots__ = ("category", "core", "id")
+
     def __init__(self, data):
         """Accept a row from ``extensions.csv`` and assign values to properties."""
         #: The Id cell.
@@ -17,4 +19,4 @@ class Extension:
 
         This method is defined to match the method in `ExtensionVersion`.
         """
-        return self.__dict__
+        return {"id": self.id, "category": self.category, "core": self.core}
@@ -31,13 +31,34 @@ See additional details in :doc:`extension_version`.
 """  # noqa: E501
 
 import csv
+import hashlib
+import json
+import os
+import threading
+from contextlib import suppress
 from io import StringIO
 from urllib.parse import urlsplit
 
-from ocdsextensionregistry.exceptions import DoesNotExist, MissingExtensionMetadata
+from ocdsextensionregistry.exceptions import (
+    DoesNotExist,
+    MissingExtensionMetadata,
+    UnknownLatestVersion,
+    UnsupportedSnapshotError,
+)
 from ocdsextensionregistry.extension import Extension
 from ocdsextensionregistry.extension_version import ExtensionVersion
-from ocdsextensionregistry.util import _resolve
+from ocdsextensionregistry.util import _resolve, get_latest_version
+
+# The fields on which to index extension versions, from most to least selective. The indexes on extensions data are
+# built on first use.
+_INDEXES = (("id", "version"), ("base_url",), ("download_url",), ("id",), ("category",), ("core",))
+_EAGER_INDEXES = _INDEXES[:4]
+
+#: The format version of snapshots written by :meth:`ExtensionRegistry.dump`.
+SNAPSHOT_VERSION = 1
+_VERSION_COLUMNS = ("Id", "Date", "Version", "Base URL", "Download URL")
+_VERSION_FIELDS = ("id", "date", "version", "base_url", "download_url")
+_EXTENSION_FIELDS = ("category", "core")
 
 
 class ExtensionRegistry:
@@ -49,22 +70,130 @@ class ExtensionRegistry:
         If extensions_data is not provided, the extension versions will not have category or core properties.
         URLs starting with ``file://`` will be read from the filesystem.
         """
-        self.versions = []
+        self._sources = (extension_versions_data, extensions_data)
+
+        extension_versions_data = _resolve(extension_versions_data)
+        if extensions_data:
+            extensions_data = _resolve(extensions_data)
+
+        #: A hash of the contents of ``extension_versions.csv`` and ``extensions.csv``.
+        self.key = _key(extension_versions_data, extensions_data)
+        self.versions = _parse(extension_versions_data, extensions_data)
+
+        self._build_indexes()
+
+    @classmethod
+    def load(cls, path, extension_versions_data=None, extensions_data=None):
+        """
+        Read a registry from a snapshot written by :meth:`dump`.
+
+        If ``extension_versions_data`` is provided, accept it and, optionally, ``extensions_data`` as in
+        :meth:`__init__`. If the snapshot doesn't exist, is in another format, or was written from other data,
+        initialize the registry from the data, and write a new snapshot.
+
+        :param path: the snapshot's path
+        :raises UnsupportedSnapshotError: if ``extension_versions_data`` isn't provided and the snapshot is in another
+                                          format
+        """
+        if extension_versions_data is None:
+            with open(path) as f:
+                snapshot = _read_snapshot(f)
+            if snapshot is None:
+                raise UnsupportedSnapshotError(f"{path} is not a version {SNAPSHOT_VERSION} registry snapshot")
+            return cls._from_snapshot(snapshot, (None, None))
+
+        sources = (extension_versions_data, extensions_data)
 
-        # If extensions data is provided, prepare to merge it with extension versions data.
-        extensions = {}
+        extension_versions_data = _resolve(extension_versions_data)
         if extensions_data:
             extensions_data = _resolve(extensions_data)
-            for row in csv.DictReader(StringIO(extensions_data)):
-                extension = Extension(row)
-                extensions[extension.id] = extension
+
+        snapshot = None
+        with suppress(FileNotFoundError), open(path) as f:
+            snapshot = _read_snapshot(f)
+        if snapshot is not None and snapshot["key"] == _key(extension_versions_data, extensions_data):
+            return cls._from_snapshot(snapshot, sources)
+
+        registry = cls(extension_versions_data, extensions_data)
+        registry._sources = sources
+        registry.dump(path)
+        return registry
+
+    def refresh(self, extension_versions_data=None, extensions_data=None):
+        """
+        Read ``extension_versions.csv`` and ``extensions.csv`` again, and update the extension versions that changed.
+
+        If ``extension_versions_data`` isn't provided, use the arguments with which the registry was initialized.
+        Remote files are revalidated with conditional requests.
+
+        Extension versions whose rows are unchanged are kept, with their cached files, metadata, schemas and codelists.
+        Extension versions whose rows are changed are replaced, and those whose rows are removed are removed.
+
+        :returns: whether the registry changed
+        :rtype: bool
+        """
+        if extension_versions_data is None:
+            extension_versions_data, extensions_data = self._sources
+            if extension_versions_data is None:
+                raise ValueError("extension_versions_data is required, as the registry was loaded without it")
+
+        self._sources = (extension_versions_data, extensions_data)
 
         extension_versions_data = _resolve(extension_versions_data)
-        for row in csv.DictReader(StringIO(extension_versions_data)):
-            version = ExtensionVersion(row)
-            if version.id in extensions:
-                version.update(extensions[version.id])
-            self.versions.append(version)
+        if extensions_data:
+            extensions_data = _resolve(extensions_data)
+
+        key = _key(extension_versions_data, extensions_data)
+        if key == self.key:
+            return False
+
+        existing = {(version.id, version.version): version for version in self.versions}
+        versions = []
+        for version in _parse(extension_versions_data, extensions_data):
+            current = existing.pop((version.id, version.version), None)
+            if current is not None and all(getattr(current, f) == getattr(version, f) for f in _VERSION_FIELDS):
+                # The category and core properties don't affect the cached data.
+                for field in _EXTENSION_FIELDS:
+                    if hasattr(version, field):
+                        setattr(current, field, getattr(version, field))
+                    elif hasattr(current, field):
+                        delattr(current, field)
+                versions.append(current)
+            else:
+                if current is not None:
+                    current.close_zipfile()
+                versions.append(version)
+
+        for version in existing.values():
+            version.close_zipfile()
+
+        self.key = key
+        self.versions = versions
+        self._build_indexes()
+        return True
+
+    def dump(self, path):
+        """
+        Write the registry to a snapshot in JSON format, which :meth:`load` reads.
+
+        :param path: the snapshot's path
+        """
+        # If the registry was initialized with extensions data, extension versions have its properties.
+        extensions = any(hasattr(version, "category") for version in self.versions)
+        fields = _VERSION_FIELDS + _EXTENSION_FIELDS if extensions else _VERSION_FIELDS
+
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "key": self.key,
+            "extensions": extensions,
+            "versions": [[getattr(version, field, None) for field in fields] for version in self.versions],
+        }
+
+        # Write to a temporary file and rename it, so that concurrent readers never read a partial snapshot.
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp, path)
 
     def filter(self, **kwargs):
         """
@@ -74,7 +203,7 @@ class ExtensionRegistry:
                                           was not initialized with extensions data
         """
         try:
-            return [ver for ver in self.versions if all(getattr(ver, k) == v for k, v in kwargs.items())]
+            return [ver for ver in self._candidates(kwargs) if all(getattr(ver, k) == v for k, v in kwargs.items())]
         except AttributeError as e:
             self._handle_attribute_error(e)
 
@@ -87,7 +216,9 @@ class ExtensionRegistry:
                                           was not initialized with extensions data
         """
         try:
-            return next(ver for ver in self.versions if all(getattr(ver, k) == v for k, v in kwargs.items()))
+            return next(
+                ver for ver in self._candidates(kwargs) if all(getattr(ver, k) == v for k, v in kwargs.items())
+            )
         except StopIteration as e:
             raise DoesNotExist(f"Extension version matching {kwargs!r} does not exist.") from e
         except AttributeError as e:
@@ -103,11 +234,101 @@ class ExtensionRegistry:
         path = f"{parsed.path.rsplit('/', 1)[0]}/"
         return self.get(base_url=parsed._replace(path=path).geturl())
 
+    def latest_versions(self):
+        """
+        Return a dict in which keys are extension identifiers and values are the extensions' latest versions.
+
+        Extensions whose latest versions can't be determined are omitted. See
+        :func:`~ocdsextensionregistry.util.get_latest_version`. The result is cached until the registry changes.
+        """
+        if self._latest_versions is None:
+            latest_versions = {}
+            for (extension_id,), versions in self._index(("id",)).items():
+                with suppress(UnknownLatestVersion):
+                    latest_versions[extension_id] = get_latest_version(versions)
+            self._latest_versions = latest_versions
+        return self._latest_versions.copy()
+
     def __iter__(self):
         """Iterate over the extension versions in the registry."""
         yield from self.versions
 
+    @classmethod
+    def _from_snapshot(cls, snapshot, sources):
+        registry = cls.__new__(cls)
+        registry._sources = sources  # noqa: SLF001 # same class
+        registry.key = snapshot["key"]
+        registry.versions = []
+
+        for row in snapshot["versions"]:
+            version = ExtensionVersion(dict(zip(_VERSION_COLUMNS, row, strict=False)))
+            # Extension versions without a matching extension have no category or core properties.
+            if snapshot["extensions"] and row[-1] is not None:
+                version.category, version.core = row[len(_VERSION_COLUMNS) :]
+            registry.versions.append(version)
+
+        registry._build_indexes()  # noqa: SLF001 # same class
+        return registry
+
+    def _build_indexes(self):
+        self._indexes = {}
+        self._latest_versions = None
+        for fields in _EAGER_INDEXES:
+            self._index(fields)
+
+    def _candidates(self, kwargs):
+        # Return the extension versions that match the most selective index, in the registry's order.
+        for fields in _INDEXES:
+            if all(field in kwargs for field in fields):
+                return self._index(fields).get(tuple(kwargs[field] for field in fields), [])
+        return self.versions
+
+    def _index(self, fields):
+        if fields not in self._indexes:
+            index = {}
+            for version in self.versions:
+                index.setdefault(tuple(getattr(version, field) for field in fields), []).append(version)
+            self._indexes[fields] = index
+        return self._indexes[fields]
+
     def _handle_attribute_error(self, e):
         if "'category'" in str(e.args) or "'core'" in str(e.args):
             raise MissingExtensionMetadata("ExtensionRegistry must be initialized with extensions data.") from e
         raise  # noqa: PLE0704 # false positive
+
+
+def _parse(extension_versions_data, extensions_data):
+    versions = []
+
+    # If extensions data is provided, prepare to merge it with extension versions data.
+    extensions = {}
+    if extensions_data:
+        for row in csv.DictReader(StringIO(extensions_data)):
+            extension = Extension(row)
+            extensions[extension.id] = extension
+
+    for row in csv.DictReader(StringIO(extension_versions_data)):
+        version = ExtensionVersion(row)
+        if version.id in extensions:
+            version.update(extensions[version.id])
+        versions.append(version)
+
+    return versions
+
+
+def _key(extension_versions_data, extensions_data):
+    hasher = hashlib.sha256(extension_versions_data.encode())
+    if extensions_data:
+        hasher.update(b"\0")
+        hasher.update(extensions_data.encode())
+    return hasher.hexdigest()
+
+
+def _read_snapshot(f):
+    try:
+        snapshot = json.load(f)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    return snapshot
@@ -2,13 +2,20 @@ import csv
 import json
 import os
 import re
+import threading
+import time
 import warnings
 import zipfile
-from contextlib import closing, suppress
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, suppress
+from functools import lru_cache
 from io import StringIO
+from types import MappingProxyType
 from urllib.parse import urlsplit
 
 import requests
+from requests_cache import EXPIRE_IMMEDIATELY, NEVER_EXPIRE
 
 from ocdsextensionregistry.codelist import Codelist
 from ocdsextensionregistry.exceptions import (
@@ -17,14 +24,52 @@ from ocdsextensionregistry.exceptions import (
     NotAvailableInBulk,
     UnsupportedSchemeError,
 )
-from ocdsextensionregistry.util import _resolve_zip, session
+from ocdsextensionregistry.util import POOL_MAXSIZE, _request_expire_after, _resolve_zip, session
 
 SCHEMAS = ("record-package-schema.json", "release-package-schema.json", "release-schema.json")
 FIELD_NAME = "4F434453"  # OCDS in hexidecimal
 FIELD = f"{{{FIELD_NAME}}}"
+#: The maximum number of files to download from an extension version's base URL, after which its ZIP archive is
+#: downloaded instead.
+RAW_FILES_MAX = int(os.getenv("OCDS_RAW_FILES_MAX", "3"))
+#: The number of seconds for which to remember that an optional file doesn't exist, without requesting it again.
+#:
+#: This is remembered per extension version, in memory. The HTTP session doesn't cache "Not Found" responses, so that
+#: a file that is added later, or that was temporarily unavailable, isn't missing forever.
+MISSING_FILES_TTL = int(os.getenv("OCDS_MISSING_FILES_TTL", "3600"))
+#: The properties of extension versions that :func:`hydrate` can populate.
+HYDRATE_PARTS = ("files", "metadata", "schemas", "codelists")
+
+# The default URL schemes to allow, shared by all instances until modified.
+_ALLOW_SCHEMES = frozenset({"http", "https"})
+_NO_FILE_URLS = MappingProxyType({})
+# Whether the current thread is one of a pool's threads, like hydrate()'s.
+_pool_thread = threading.local()
 
 
 class ExtensionVersion:
+    # Registries can have thousands of extension versions.
+    __slots__ = (
+        "_allow_schemes",
+        "_codelists",
+        "_failed_responses",
+        "_file_urls",
+        "_files",
+        "_metadata",
+        "_missing_files",
+        "_raw_files",
+        "_schemas",
+        "_url_pattern",
+        "base_url",
+        "category",
+        "core",
+        "date",
+        "download_url",
+        "id",
+        "input_url",
+        "version",
+    )
+
     def __init__(self, data, input_url=None, url_pattern=None, file_urls=None):
         """
         Accept a row from ``extension_versions.csv`` and assign values to properties.
@@ -46,12 +91,14 @@ class ExtensionVersion:
         #: The URL that was provided in a list to
         #: :meth:`ocdsextensionregistry.profile_builder.ProfileBuilder.extensions`.
         self.input_url = input_url
-        #: The URL schemes to allow.
-        self.allow_schemes = {"http", "https"}
 
+        self._allow_schemes = None
         self._url_pattern = url_pattern
-        self._file_urls = file_urls or {}
+        self._file_urls = file_urls or _NO_FILE_URLS
         self._files = None
+        self._raw_files = None
+        self._missing_files = None
+        self._failed_responses = None
         self._metadata = None
         self._schemas = None
         self._codelists = None
@@ -80,11 +127,29 @@ class ExtensionVersion:
 
     def as_dict(self):
         """Return the object's public properties as a dictionary."""
-        return {
-            key: value
-            for key, value in self.__dict__.items()
-            if key not in {"input_url", "allow_schemes"} and not key.startswith("_")
+        data = {
+            "id": self.id,
+            "date": self.date,
+            "version": self.version,
+            "base_url": self.base_url,
+            "download_url": self.download_url,
         }
+        # The category and core properties are set by update(), if the extension registry has extensions data.
+        for key in ("category", "core"):
+            with suppress(AttributeError):
+                data[key] = getattr(self, key)
+        return data
+
+    @property
+    def allow_schemes(self):
+        """Return the URL schemes to allow."""
+        if self._allow_schemes is None:
+            self._allow_schemes = set(_ALLOW_SCHEMES)
+        return self._allow_schemes
+
+    @allow_schemes.setter
+    def allow_schemes(self, value):
+        self._allow_schemes = value
 
     def get_url(self, basename):
         """
@@ -106,22 +171,53 @@ class ExtensionVersion:
 
         If the ``default`` is set and the file does not exist, return the provided ``default`` value.
 
-        If the extension has a download URL, cache all the files' contents. Otherwise, download and cache the
-        requested file's contents. Raise an HTTPError if a download fails.
+        If the extension has a download URL, read the file from the ZIP archive. However, if the extension has a base
+        URL, and if few files were requested and the ZIP archive isn't downloaded, download the requested file from
+        the base URL, instead. See :data:`RAW_FILES_MAX`. If that download fails, read the ZIP archive.
+
+        If the extension has no download URL, download and cache the requested file's contents. Raise an HTTPError if
+        a download fails.
+
+        If the ``default`` is set and the file was not found at its URL, remember this for
+        :data:`MISSING_FILES_TTL` seconds, instead of requesting the file again.
 
         :raises DoesNotExist: if the file isn't in the extension
         :raises zipfile.BadZipFile: if the download URL is not a ZIP file
         """
-        if basename not in self.files and not self.download_url:
+        if self._raw_files and basename in self._raw_files:
+            return self._raw_files[basename]
+        if default is not None and self._is_missing(basename):
+            return default
+
+        if self._use_raw_files(1):
             url = self.get_url(basename)
+            with suppress(UnicodeDecodeError, UnsupportedSchemeError, requests.RequestException):
+                self._raise_for_scheme(url)
+                response = session.get(url, expire_after=self._expire_after)
+                if response.ok:
+                    if self._raw_files is None:
+                        self._raw_files = {}
+                    self._raw_files[basename] = response.content.decode("utf-8")
+                    return self._raw_files[basename]
+                if default is not None and response.status_code == requests.codes.not_found:
+                    self._set_missing(basename)
+                    return default
+
+        if basename not in self.files and not self.download_url:
+            # If _prefetch() requested the file and failed, use its response.
+            response = self._failed_responses.pop(basename, None) if self._failed_responses else None
+            if response is None:
+                url = self.get_url(basename)
 
-            # requests supports http(s) only, but raise in case other packages add adapters for other schemes.
-            self._raise_for_scheme(url)
-            response = session.get(url)
+                # requests supports http(s) only, but raise in case other packages add adapters for other schemes.
+                self._raise_for_scheme(url)
+                response = session.get(url, expire_after=self._expire_after)
 
             if default is None or response.status_code != requests.codes.not_found:
                 response.raise_for_status()
                 self._files[basename] = response.content.decode("utf-8")
+            else:
+                self._set_missing(basename)
 
         if default is not None:
             return self.files.get(basename, default)
@@ -129,35 +225,46 @@ class ExtensionVersion:
             raise DoesNotExist(f"File {basename!r} does not exist in {self}")
         return self.files[basename]
 
+    def prefetch(self, basenames):
+        """
+        Prepare to read the files within the extension, before calling :meth:`remote` for each.
+
+        Unless few files are requested in total, such that :meth:`remote` downloads them from the base URL (see
+        :data:`RAW_FILES_MAX`), read the ZIP archive or, if the extension has no download URL, download the files
+        concurrently. Errors are ignored, so that :meth:`remote` raises as usual.
+
+        :param basenames: the files' names
+        """
+        if not self._use_raw_files(len(basenames)):
+            self._prefetch(basenames)
+
     @property
     def files(self):
         """
         Return the unparsed contents of all files. Decode the contents of CSV, JSON and Markdown files.
 
-        If the extension has a download URL, cache all the files' contents. Otherwise, return an empty dict.
-        Raise an HTTPError if the download fails.
+        If the extension has a download URL, return a mapping that reads each file's contents from the ZIP archive on
+        first access, and caches it. Otherwise, return an empty dict. Raise an HTTPError if the download fails.
 
         :raises zipfile.BadZipFile: if the download URL is not a ZIP file
         """
         if self._files is None:
-            files = {}
-
             if self.download_url:
-                with closing(self.zipfile()) as zipfile:
-                    names = zipfile.namelist()
-                    start = len(names[0])
+                self._files = _ArchiveFiles(self.zipfile)
+            else:
+                self._files = {}
 
-                    for name in names[1:]:
-                        filename = name[start:]
-                        if filename[-1] != "/" and not filename.startswith("."):
-                            content = zipfile.read(name)
-                            if os.path.splitext(name)[1] in {".csv", ".json", ".md"}:
-                                content = content.decode("utf-8")
-                            files[filename] = content
+        return self._files
 
-            self._files = files
+    def close_zipfile(self):
+        """
+        Close the ZIP archive from which :attr:`files` are read, to release its memory.
 
-        return self._files
+        Files that were read remain cached. Files that weren't read are read from the archive on first access, which
+        is downloaded again if it isn't in the HTTP cache.
+        """
+        if isinstance(self._files, _ArchiveFiles):
+            self._files.close()
 
     def zipfile(self):
         """
@@ -175,7 +282,7 @@ class ExtensionVersion:
             #
             # _resolve_zip() supports the file:// scheme, for get_standard_file_contents() only.
             self._raise_for_scheme(self.download_url)
-            return _resolve_zip(self.download_url)
+            return _resolve_zip(self.download_url, expire_after=self._expire_after)
 
         raise NotAvailableInBulk("ExtensionVersion.zipfile() requires a download_url.")
 
@@ -215,6 +322,7 @@ class ExtensionVersion:
             else:
                 names = SCHEMAS
 
+            self.prefetch(names)
             for name in names:
                 try:
                     schemas[name] = json.loads(self.remote(name))
@@ -246,6 +354,7 @@ class ExtensionVersion:
             else:
                 names = []
 
+            self.prefetch([f"codelists/{name}" for name in names])
             for name in names:
                 try:
                     codelists[name] = Codelist(name)
@@ -265,6 +374,70 @@ class ExtensionVersion:
 
         return self._codelists
 
+    def _is_missing(self, basename):
+        if self._missing_files and basename in self._missing_files:
+            if time.monotonic() < self._missing_files[basename]:
+                return True
+            del self._missing_files[basename]
+        return False
+
+    def _set_missing(self, basename):
+        if self._missing_files is None:
+            self._missing_files = {}
+        self._missing_files[basename] = time.monotonic() + MISSING_FILES_TTL
+
+    def _use_raw_files(self, count):
+        # Download files from the base URL, instead of downloading the ZIP archive to read a few files, unless the
+        # archive is local, already read, or in the HTTP cache.
+        return bool(
+            self._files is None
+            and self.base_url
+            and self.download_url
+            and not self.download_url.startswith("file:")
+            and len(self._raw_files or ()) + count <= RAW_FILES_MAX
+            and not session.cache.contains(url=self.download_url)
+        )
+
+    def _prefetch(self, basenames):
+        # If the extension has a download URL, read the ZIP archive. Otherwise, download the files concurrently,
+        # instead of one at a time in remote(). Errors are ignored, so that remote() raises or warns as usual.
+        if self.download_url:
+            with suppress(OSError, UnsupportedSchemeError, requests.RequestException, zipfile.BadZipFile):
+                self.files  # noqa: B018
+            return
+
+        basenames = [basename for basename in basenames if basename not in self.files]
+        if not basenames:
+            return
+
+        if self._failed_responses is None:
+            self._failed_responses = {}
+
+        def fetch(basename):
+            with suppress(NotImplementedError, UnicodeDecodeError, UnsupportedSchemeError, requests.RequestException):
+                url = self.get_url(basename)
+                self._raise_for_scheme(url)
+                response = session.get(url, expire_after=self._expire_after)
+                if response.ok:
+                    self._files[basename] = response.content.decode("utf-8")
+                else:
+                    # remote() raises or returns the default, without requesting the file again.
+                    self._failed_responses[basename] = response
+
+        # hydrate() already populates each extension version in its own thread. Don't start threads in its threads.
+        if getattr(_pool_thread, "active", False):
+            for basename in basenames:
+                fetch(basename)
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(basenames), POOL_MAXSIZE)) as executor:
+                executor.map(fetch, basenames)
+
+    @property
+    def _expire_after(self):
+        # A frozen version can't change, so its responses never expire. A live version, like the master branch, is
+        # revalidated with a conditional request (If-None-Match), which costs a round-trip but not a download.
+        return _request_expire_after(NEVER_EXPIRE if self.date else EXPIRE_IMMEDIATELY)
+
     @property
     def repository_full_name(self):
         """
@@ -356,101 +529,230 @@ class ExtensionVersion:
         """
         return self._repository_property("ref_download_url")
 
-    def _repository_full_name(self, parsed, config):
-        match = re.search(config["full_name:pattern"], parsed.path)
-        if match:
-            return match.group(1)
-        raise AttributeError(f"{parsed.path} !~ {config['full_name:pattern']}")
+    def _repository_full_name(self, match):
+        return match.group("full_name")
 
-    def _repository_name(self, parsed, config):
-        match = re.search(config["name:pattern"], parsed.path)
-        if match:
-            return match.group(1)
-        raise AttributeError(f"{parsed.path} !~ {config['name:pattern']}")
+    def _repository_name(self, match):
+        return match.group("name")
 
-    def _repository_user(self, parsed, config):
-        match = re.search(config["user:pattern"], parsed.path)
-        if match:
-            return match.group(1)
-        raise AttributeError(f"{parsed.path} !~ {config['user:pattern']}")
+    def _repository_user(self, match):
+        return match.group("user")
 
-    def _repository_ref(self, parsed, config):
-        match = re.search(config["ref:pattern"], parsed.path)
-        if match:
-            return match.group(1)
-        raise AttributeError(f"{parsed.path} !~ {config['ref:pattern']}")
+    def _repository_ref(self, match):
+        return match.group("ref")
 
-    def _repository_user_page(self, parsed, config):
-        return f"{config['html_page:prefix']}{self._repository_user(parsed, config)}"
+    def _repository_user_page(self, match):
+        return f"{match.host.html_page_prefix}{match.group('user')}"
 
-    def _repository_html_page(self, parsed, config):
-        return f"{config['html_page:prefix']}{self._repository_full_name(parsed, config)}"
+    def _repository_html_page(self, match):
+        return f"{match.host.html_page_prefix}{match.group('full_name')}"
 
-    def _repository_url(self, parsed, config):
-        return f"{config['url:prefix']}{self._repository_full_name(parsed, config)}{config['url:suffix']}"
+    def _repository_url(self, match):
+        return f"{match.host.url_prefix}{match.group('full_name')}{match.host.url_suffix}"
 
-    def _repository_ref_download_url(self, parsed, config):
-        return config["download:format"].format(
-            full_name=self._repository_full_name(parsed, config),
-            ref=self._repository_ref(parsed, config),
-        )
+    def _repository_ref_download_url(self, match):
+        return match.host.download_format.format(full_name=match.group("full_name"), ref=match.group("ref"))
 
     def _repository_property(self, prop):
-        parsed = urlsplit(self.base_url)
-        config = self._configuration(parsed)
-        if config:
-            return getattr(self, f"_repository_{prop}")(parsed, config)
+        match = _match_repository(self.base_url, tuple(REPOSITORY_HOSTS))
+        if match:
+            return getattr(self, f"_repository_{prop}")(match)
         raise NotImplementedError(f"can't determine {prop} from {self.base_url}")
 
-    def _configuration(self, parsed):
-        # Multiple websites are implemented to explore the robustness of the approach.
-        #
-        # Savannah has both cgit and GitWeb interfaces on the same domain, e.g.
-        # https://git.savannah.gnu.org/cgit/aspell.git/plain/COPYING?h=devel
-        # https://git.savannah.gnu.org/gitweb/?p=aspell.git;a=blob_plain;f=COPYING;h=b1e3f5a2638797271cbc9b91b856c05ed6942c8f;hb=HEAD
-        #
-        # If all interfaces could be disambiguated using the domain alone, we could implement the lookup of the
-        # configuration as a dictionary. Since that's not the case, the lookup is implemented as a method.
-        netloc = parsed.netloc
-        if netloc == "raw.githubusercontent.com":
-            # Sample base URL: https://raw.githubusercontent.com/open-contracting-extensions/ocds_bid_extension/v1.1.4/
-            return {
-                "full_name:pattern": r"\A/([^/]+/[^/]+)",
-                "name:pattern": r"\A/[^/]+/([^/]+)",
-                "user:pattern": r"\A/([^/]+)",
-                "ref:pattern": r"\A/[^/]+/[^/]+/([^/]+)/[^/]*\Z",
-                "html_page:prefix": "https://github.com/",
-                "url:prefix": "git@github.com:",
-                "url:suffix": ".git",
-                "download:format": "https://github.com/{full_name}/archive/{ref}.zip",
-            }
-        if netloc == "bitbucket.org":
-            # A base URL may look like: https://bitbucket.org/facebook/hgsql/raw/default/
-            return {
-                "full_name:pattern": r"\A/([^/]+/[^/]+)",
-                "name:pattern": r"\A/[^/]+/([^/]+)",
-                "user:pattern": r"\A/([^/]+)",
-                "ref:pattern": r"\A/[^/]+/[^/]+/raw/([^/]+)/[^/]*\Z",
-                "html_page:prefix": "https://bitbucket.org/",
-                "url:prefix": "https://bitbucket.org/",
-                "url:suffix": ".git",  # assumes Git not Mercurial, which can't be disambiguated using the base URL
-                "download:format": "https://bitbucket.org/{full_name}/get/{ref}.zip",
-            }
-        if netloc == "gitlab.com":
-            # A base URL may look like: https://gitlab.com/gitlab-org/gitter/env/raw/master/
-            return {
-                "full_name:pattern": r"\A/(.+)/-/raw/",
-                "name:pattern": r"/([^/]+)/-/raw/",
-                "user:pattern": r"\A/([^/]+)",
-                "ref:pattern": r"/-/raw/([^/]+)/[^/]*\Z",
-                "html_page:prefix": "https://gitlab.com/",
-                "url:prefix": "https://gitlab.com/",
-                "url:suffix": ".git",
-                "download:format": "https://gitlab.com/{full_name}/-/archive/{ref}.zip",
-            }
-        return None
-
     def _raise_for_scheme(self, url):
         scheme = urlsplit(url).scheme
-        if scheme not in self.allow_schemes:
+        if scheme not in (_ALLOW_SCHEMES if self._allow_schemes is None else self._allow_schemes):
             raise UnsupportedSchemeError(f"URI scheme '{scheme}' not supported")
+
+
+def hydrate(versions, *, parts=("metadata", "schemas", "codelists"), max_workers=None):
+    """
+    Download and parse the files of the extension versions concurrently, using a pool of threads.
+
+    Each extension version is populated by one thread. If a property fails for an extension version, its remaining
+    properties are not populated.
+
+    :param versions: the extension versions
+    :param parts: the properties to populate, from :data:`HYDRATE_PARTS`
+    :param int max_workers: the maximum number of threads (default ``REQUESTS_POOL_MAXSIZE``, or 10)
+    :returns: a dict in which keys are the extension versions that failed, and values are the exceptions
+    :raises ValueError: if a part is unknown
+    """
+    if unknown := set(parts) - set(HYDRATE_PARTS):
+        raise ValueError(f"unknown parts: {', '.join(sorted(unknown))}")
+
+    def populate(version):
+        with _in_pool_thread():
+            for part in parts:
+                getattr(version, part)
+
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max_workers or POOL_MAXSIZE) as executor:
+        futures = {executor.submit(populate, version): version for version in versions}
+        for future in as_completed(futures):
+            if (exception := future.exception()) is not None:
+                errors[futures[future]] = exception
+    return errors
+
+
+@contextmanager
+def _in_pool_thread():
+    # Mark the current thread as one of a pool's threads, so that extension versions don't start threads in it.
+    _pool_thread.active = True
+    try:
+        yield
+    finally:
+        _pool_thread.active = False
+
+
+class RepositoryHost:
+    """A repository hosting service, whose URLs are parsed to determine the properties of extensions' repositories."""
+
+    def __init__(self, netloc, patterns, html_page_prefix, url_prefix, url_suffix, download_format):
+        """
+        :param str netloc: the network location of base URLs on the hosting service
+        :param dict patterns: regular expressions with one group, whose keys are ``full_name``, ``name``, ``user`` and
+            ``ref``, to match against the paths of base URLs
+        :param str html_page_prefix: the prefix of the URLs of landing pages
+        :param str url_prefix: the prefix of the URLs of repositories
+        :param str url_suffix: the suffix of the URLs of repositories
+        :param str download_format: the format string of download URLs, with ``full_name`` and ``ref`` fields
+        """
+        self.netloc = netloc
+        self.patterns = {key: re.compile(pattern) for key, pattern in patterns.items()}
+        self.html_page_prefix = html_page_prefix
+        self.url_prefix = url_prefix
+        self.url_suffix = url_suffix
+        self.download_format = download_format
+
+    def matches(self, parsed):
+        """Return whether the parsed base URL is on the hosting service."""
+        return parsed.netloc == self.netloc
+
+
+# Multiple websites are implemented to explore the robustness of the approach.
+#
+# Savannah has both cgit and GitWeb interfaces on the same domain, e.g.
+# https://git.savannah.gnu.org/cgit/aspell.git/plain/COPYING?h=devel
+# https://git.savannah.gnu.org/gitweb/?p=aspell.git;a=blob_plain;f=COPYING;h=b1e3f5a2638797271cbc9b91b856c05ed6942c8f;hb=HEAD
+#
+# If all interfaces could be disambiguated using the domain alone, we could implement the lookup of the hosting service
+# as a dictionary. Since that's not the case, each hosting service implements a matches() method.
+
+#: The repository hosting services that are supported, in order of precedence. Add a
+#: :class:`~ocdsextensionregistry.extension_version.RepositoryHost` to support another hosting service.
+REPOSITORY_HOSTS = [
+    # Sample base URL: https://raw.githubusercontent.com/open-contracting-extensions/ocds_bid_extension/v1.1.4/
+    RepositoryHost(
+        "raw.githubusercontent.com",
+        {
+            "full_name": r"\A/([^/]+/[^/]+)",
+            "name": r"\A/[^/]+/([^/]+)",
+            "user": r"\A/([^/]+)",
+            "ref": r"\A/[^/]+/[^/]+/([^/]+)/[^/]*\Z",
+        },
+        html_page_prefix="https://github.com/",
+        url_prefix="git@github.com:",
+        url_suffix=".git",
+        download_format="https://github.com/{full_name}/archive/{ref}.zip",
+    ),
+    # A base URL may look like: https://bitbucket.org/facebook/hgsql/raw/default/
+    RepositoryHost(
+        "bitbucket.org",
+        {
+            "full_name": r"\A/([^/]+/[^/]+)",
+            "name": r"\A/[^/]+/([^/]+)",
+            "user": r"\A/([^/]+)",
+            "ref": r"\A/[^/]+/[^/]+/raw/([^/]+)/[^/]*\Z",
+        },
+        html_page_prefix="https://bitbucket.org/",
+        url_prefix="https://bitbucket.org/",
+        url_suffix=".git",  # assumes Git not Mercurial, which can't be disambiguated using the base URL
+        download_format="https://bitbucket.org/{full_name}/get/{ref}.zip",
+    ),
+    # A base URL may look like: https://gitlab.com/gitlab-org/gitter/env/raw/master/
+    RepositoryHost(
+        "gitlab.com",
+        {
+            "full_name": r"\A/(.+)/-/raw/",
+            "name": r"/([^/]+)/-/raw/",
+            "user": r"\A/([^/]+)",
+            "ref": r"/-/raw/([^/]+)/[^/]*\Z",
+        },
+        html_page_prefix="https://gitlab.com/",
+        url_prefix="https://gitlab.com/",
+        url_suffix=".git",
+        download_format="https://gitlab.com/{full_name}/-/archive/{ref}.zip",
+    ),
+]
+
+
+class _RepositoryMatch:
+    __slots__ = ("groups", "host", "path")
+
+    def __init__(self, host, path):
+        self.host = host
+        self.path = path
+        self.groups = {}
+        for key, pattern in host.patterns.items():
+            match = pattern.search(path)
+            self.groups[key] = match.group(1) if match else None
+
+    def group(self, key):
+        value = self.groups[key]
+        if value is None:
+            raise AttributeError(f"{self.path} !~ {self.host.patterns[key].pattern}")
+        return value
+
+
+# Many extension versions share a base URL, and properties are accessed repeatedly. The hosting services are part of
+# the key, in case REPOSITORY_HOSTS is modified.
+@lru_cache(maxsize=4096)
+def _match_repository(base_url, hosts):
+    parsed = urlsplit(base_url)
+    for host in hosts:
+        if host.matches(parsed):
+            return _RepositoryMatch(host, parsed.path)
+    return None
+
+
+class _ArchiveFiles(Mapping):
+    # Read the central directory of the ZIP archive, and read and decode each file on first access.
+    def __init__(self, opener):
+        self._opener = opener
+        self._zipfile = opener()
+        self._contents = {}
+
+        names = self._zipfile.namelist()
+        start = len(names[0])
+
+        self._names = {}
+        for name in names[1:]:
+            filename = name[start:]
+            if filename[-1] != "/" and not filename.startswith("."):
+                self._names[filename] = name
+
+    def __getitem__(self, filename):
+        if filename not in self._contents:
+            name = self._names[filename]
+            if self._zipfile is None:
+                self._zipfile = self._opener()
+            content = self._zipfile.read(name)
+            if os.path.splitext(name)[1] in {".csv", ".json", ".md"}:
+                content = content.decode("utf-8")
+            self._contents[filename] = content
+        return self._contents[filename]
+
+    def __contains__(self, filename):
+        return filename in self._names
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def close(self):
+        if self._zipfile is not None:
+            self._zipfile.close()
+            self._zipfile = None
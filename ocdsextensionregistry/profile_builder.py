@@ -30,13 +30,18 @@ After initializing the profile, you can then:
 -  :meth:`~ocdsextensionregistry.profile_builder.ProfileBuilder.extensions` to iterate over the profile's versions of extensions
 """  # noqa: E501
 
+import copy
 import csv
+import hashlib
 import json
 import logging
 import os
+import threading
 import warnings
 import zipfile
-from collections.abc import Iterable
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, suppress
 from io import StringIO
 from urllib.parse import urljoin, urlsplit
 
@@ -44,10 +49,10 @@ import json_merge_patch
 import requests
 
 from ocdsextensionregistry.codelist import Codelist
-from ocdsextensionregistry.exceptions import ExtensionWarning, UnsupportedSchemeError
+from ocdsextensionregistry.exceptions import DoesNotExist, ExtensionWarning, UnsupportedSchemeError
 from ocdsextensionregistry.extension_registry import ExtensionRegistry
-from ocdsextensionregistry.extension_version import FIELD, ExtensionVersion
-from ocdsextensionregistry.util import _resolve_zip, remove_nulls, replace_refs
+from ocdsextensionregistry.extension_version import FIELD, SCHEMAS, ExtensionVersion, _in_pool_thread
+from ocdsextensionregistry.util import POOL_MAXSIZE, _resolve_zip, remove_nulls, replace_refs, session
 from ocdsextensionregistry.versioned_release_schema import get_versioned_release_schema
 
 logger = logging.getLogger("ocdsextensionregistry")
@@ -55,7 +60,14 @@ logger = logging.getLogger("ocdsextensionregistry")
 
 class ProfileBuilder:
     def __init__(
-        self, standard_tag, extension_versions, registry_base_url=None, standard_base_url=None, schema_base_url=None
+        self,
+        standard_tag,
+        extension_versions,
+        registry_base_url=None,
+        standard_base_url=None,
+        schema_base_url=None,
+        *,
+        cache_dir=None,
     ):
         """
         Accept an OCDS version and either a dictionary of extension identifiers and versions, or a list of extensions'
@@ -72,9 +84,18 @@ class ProfileBuilder:
             ``'https://raw.githubusercontent.com/open-contracting/extension_registry/main/'``
         :param standard_base_url: the standard's base URL, defaults to
             ``f'https://codeload.github.com/open-contracting/standard/zip/{standard_tag}'``
-            (can be a ``file://`` URL to a directory or a ZIP file, or the bytes of a ZIP file)
+            (can be a ``file://`` URL to a directory or a ZIP file, or the bytes of a ZIP file, or the URL of a
+            published schema directory ending in ``/``, like
+            ``f'https://standard.open-contracting.org/schema/{standard_tag}/'``, from which only the schema and
+            codelist files are downloaded, in English)
         :param str schema_base_url: the schema's base URL, e.g.
             ``'https://standard.open-contracting.org/profiles/ppp/schema/1__0__0__beta/'``
+        :param str cache_dir: a directory in which to store the release schema patch and the patched schemas, keyed
+            by the standard tag, the extensions, and the methods' arguments. Frozen versions of extensions (with a
+            date in the registry) are keyed by their identifier, version and date, and are assumed to not change, so
+            that their files aren't downloaded on a cache hit. Other extensions are keyed by the hashes of their
+            release schema patches, which are downloaded on every call. The standard's files at an ``http(s)`` URL are
+            assumed to not change. Files in the directory are never deleted, so the directory grows without limit.
         :type standard_base_url: str or bytes
         :type extension_versions: dict or list
         """
@@ -89,8 +110,13 @@ class ProfileBuilder:
         self.registry_base_url = registry_base_url
         self.standard_base_url = standard_base_url
         self.schema_base_url = schema_base_url
+        self.cache_dir = cache_dir
         self._registry = None
-        self._file_cache = {}
+        self._extensions = None
+        self._file_cache = None
+        self._patch_cache = {}
+        self._provenance = None
+        self._patched_cache = {}
 
     @property
     def registry(self):
@@ -119,7 +145,17 @@ class ProfileBuilder:
         return ExtensionVersion(data, **kwargs)
 
     def extensions(self):
-        """Return the matching extension versions from the registry."""
+        """
+        Return the matching extension versions from the registry.
+
+        The extension versions are resolved on first call, and reused by later calls, along with their downloaded
+        files.
+        """
+        if self._extensions is None:
+            self._extensions = list(self._resolve_extensions())
+        yield from self._extensions
+
+    def _resolve_extensions(self):
         if isinstance(self.extension_versions, dict):
             for identifier, version in self.extension_versions.items():
                 parsed = urlsplit(version)
@@ -133,6 +169,33 @@ class ProfileBuilder:
                     continue
                 yield self._extension_from_url(url, urlsplit(url))
 
+    def prefetch(self, *, max_workers=None):
+        """
+        Download the standard's files and the extensions' files concurrently, using a pool of threads.
+
+        The other methods then read the downloaded files, and merge the extensions in order. Errors are ignored, so
+        that the other methods raise or warn as usual.
+
+        :param int max_workers: the maximum number of threads (default ``REQUESTS_POOL_MAXSIZE``, or 10)
+        """
+        with ThreadPoolExecutor(max_workers=max_workers or POOL_MAXSIZE) as executor:
+            # Submit the standard first, because its archive is the largest download.
+            standard = None
+            if self.standard_base_url:
+                standard = executor.submit(lambda: list(self._standard_files()))
+
+            for extension in self.extensions():
+                executor.submit(_prefetch_extension, extension)
+
+            # A published schema directory's files are downloaded on first access.
+            if (
+                standard is not None
+                and standard.exception() is None
+                and isinstance(self._file_cache, _SchemaDirectoryFiles)
+            ):
+                for name in standard.result():
+                    executor.submit(self._file_cache.__getitem__, name)
+
     def release_schema_patch(self, *, extension_field=None, extension_value="name", language="en"):
         """
         Return the consolidated release schema patch.
@@ -148,7 +211,22 @@ class ProfileBuilder:
             the bulk file is not a ZIP file, or if the release schema patch is not UTF-8 or not JSON
         :raises NotImplementedError: if the ``extension_value`` is not recognized
         """
+        # The patch is merged once per combination of arguments. Callers receive copies, which they can modify.
+        if not extension_field:
+            extension_value = language = None
+        key = (extension_field, extension_value, language)
+        if key not in self._patch_cache:
+            self._patch_cache[key] = self._cached_artifact(
+                "release-schema-patch",
+                {"extension_field": extension_field, "extension_value": extension_value, "language": language},
+                lambda: self._release_schema_patch(extension_field, extension_value, language),
+            )
+        return copy.deepcopy(self._patch_cache[key])
+
+    def _release_schema_patch(self, extension_field, extension_value, language):
         output = {}
+        provenance = {}
+        annotated = []
 
         # Remove `null`, because removing fields or properties is prohibited.
         for extension in self.extensions():
@@ -171,11 +249,42 @@ class ProfileBuilder:
                     value = extension.get_url("release-schema.json")
                 else:
                     raise NotImplementedError
-                _add_extension_field(patch, value, extension_field)
-            json_merge_patch.merge(output, patch)
+            else:
+                value = None
+            if isinstance(patch, dict):
+                _merge(output, patch, extension, provenance, annotated, extension_field, value)
+
+        self._provenance = provenance
+
+        # The annotated patch is the plain patch, plus the annotations. Copy it, and remove the annotations from the
+        # copies of the annotated subschemas, which deepcopy() records in its memo. A subschema that a later patch
+        # replaced has no copy.
+        plain_key = (None, None, None)
+        if extension_field and plain_key not in self._patch_cache:
+            memo = {}
+            plain = copy.deepcopy(output, memo)
+            for subschema in annotated:
+                if id(subschema) in memo:
+                    memo[id(subschema)].pop(extension_field, None)
+            self._patch_cache[plain_key] = plain
 
         return output
 
+    def schema_provenance(self):
+        """
+        Return a dict in which keys are JSON Pointers to the definitions and fields in the release schema patch, and
+        values are the extension versions that defined or last patched them.
+        """
+        if self._provenance is None:
+            self.release_schema_patch()
+            # The patch was read from the cache directory.
+            if self._provenance is None:
+                self._release_schema_patch(None, None, None)
+        return {
+            "/" + "/".join(part.replace("~", "~0").replace("/", "~1") for part in pointer): extension
+            for pointer, extension in self._provenance.items()
+        }
+
     def patched_release_schema(self, *, schema=None, language="en", **kwargs):
         """
         Return the patched release schema.
@@ -189,8 +298,23 @@ class ProfileBuilder:
         :param kwargs: see :meth:`~ocdsextensionregistry.profile_builder.ProfileBuilder.release_schema_patch`
         """
         if not schema:
-            schema = json.loads(self.get_standard_file_contents("release-schema.json", language=language))
-
+            # The standard's schema is patched once per combination of arguments.
+            key = (language, *sorted(kwargs.items()))
+            if key not in self._patched_cache:
+                self._patched_cache[key] = self._cached_artifact(
+                    "patched-release-schema",
+                    {"language": language, **kwargs},
+                    lambda: self._patched_release_schema(
+                        json.loads(self.get_standard_file_contents("release-schema.json", language=language)),
+                        language,
+                        kwargs,
+                    ),
+                )
+            return copy.deepcopy(self._patched_cache[key])
+
+        return self._patched_release_schema(schema, language, kwargs)
+
+    def _patched_release_schema(self, schema, language, kwargs):
         json_merge_patch.merge(schema, self.release_schema_patch(language=language, **kwargs))
 
         if base := self.schema_base_url:
@@ -214,6 +338,16 @@ class ProfileBuilder:
             and :meth:`~ocdsextensionregistry.profile_builder.ProfileBuilder.get_standard_file_contents`
         :param kwargs: see :meth:`~ocdsextensionregistry.profile_builder.ProfileBuilder.release_schema_patch`
         """
+        if not schema and not patched and not proxies:
+            return self._cached_artifact(
+                "release-package-schema",
+                {"embed": embed, "language": language, **kwargs},
+                lambda: self._release_package_schema(None, None, embed, proxies, language, kwargs),
+            )
+
+        return self._release_package_schema(schema, patched, embed, proxies, language, kwargs)
+
+    def _release_package_schema(self, schema, patched, embed, proxies, language, kwargs):
         if not schema:
             schema = json.loads(self.get_standard_file_contents("release-package-schema.json", language=language))
 
@@ -243,6 +377,16 @@ class ProfileBuilder:
             and :meth:`~ocdsextensionregistry.profile_builder.ProfileBuilder.get_standard_file_contents`
         :param kwargs: see :meth:`~ocdsextensionregistry.profile_builder.ProfileBuilder.release_schema_patch`
         """
+        if not schema and not patched and not proxies:
+            return self._cached_artifact(
+                "record-package-schema",
+                {"embed": embed, "language": language, **kwargs},
+                lambda: self._record_package_schema(None, None, embed, proxies, language, kwargs),
+            )
+
+        return self._record_package_schema(schema, patched, embed, proxies, language, kwargs)
+
+    def _record_package_schema(self, schema, patched, embed, proxies, language, kwargs):
         if not schema:
             schema = json.loads(self.get_standard_file_contents("record-package-schema.json", language=language))
 
@@ -272,14 +416,11 @@ class ProfileBuilder:
         """Return the standard's codelists as :class:`~ocdsextensionregistry.codelist.Codelist` objects."""
         codelists = {}
 
-        # Populate the file cache.
-        self.get_standard_file_contents("release-schema.json")
-
-        # This method shouldn't need to know about `_file_cache`.
-        for path, content in self._file_cache["en"].items():
+        for path in self._standard_files():
             name = os.path.basename(path)
             if "codelists" in path.split("/") and name:
                 codelists[name] = Codelist(name)
+                content = self.get_standard_file_contents(path)
                 codelists[name].extend(csv.DictReader(StringIO(content)), "OCDS Core")
 
         return list(codelists.values())
@@ -302,7 +443,9 @@ class ProfileBuilder:
         for extension in self.extensions():
             # We use the "codelists" field in extension.json (which standard-maintenance-scripts validates). An
             # extension is not guaranteed to offer a download URL, which is the only other way to get codelists.
-            for name in extension.metadata.get("codelists", []):
+            names = extension.metadata.get("codelists", [])
+            extension.prefetch([f"codelists/{name}" for name in names])
+            for name in names:
                 content = extension.remote(f"codelists/{name}")
 
                 if name not in codelists:
@@ -380,42 +523,202 @@ class ProfileBuilder:
 
         :param str language: the string with which to replace ``{{lang}}`` placeholders
         """
-        if language not in self._file_cache:
-            zipfile = _resolve_zip(self.standard_base_url, "schema")
-            names = zipfile.namelist()
-
-            path = names[0]
-            if self.standard_tag < "1__1__5":
-                path += "standard/schema/"
+        # The ocds_babel.translate.translate() function makes these substitutions for published files.
+        return (
+            self._standard_files()[basename]
+            .replace("{{lang}}", language)
+            .replace("{{version}}", ".".join(self.standard_tag.split("__")[:2]))
+        )
+
+    def _cached_artifact(self, name, options, build):
+        # If a cache directory is set, read the artifact if its inputs and options are unchanged. Otherwise, build and
+        # write the artifact.
+        if not self.cache_dir:
+            return build()
+
+        try:
+            key = self._artifact_key(name, options)
+        # If an extension's release schema patch can't be read, release_schema_patch() warns and skips the extension.
+        except (UnicodeDecodeError, UnsupportedSchemeError, requests.RequestException, zipfile.BadZipFile):
+            return build()
+
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        with suppress(FileNotFoundError, json.JSONDecodeError), open(path) as f:
+            return json.load(f)
+
+        artifact = build()
+
+        # Write to a temporary file and rename it, so that concurrent readers never read a partial artifact.
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(artifact, f)
+        os.replace(tmp, path)
+
+        return artifact
+
+    def _artifact_key(self, name, options):
+        standard = self.standard_base_url
+        if isinstance(standard, bytes):
+            standard = hashlib.sha256(standard).hexdigest()
+        elif isinstance(standard, str) and standard.startswith("file:"):
+            # Local files can change, unlike the files of a tag of the standard.
+            hasher = hashlib.sha256()
+            for path, content in sorted(self._standard_files().items()):
+                hasher.update(f"{path}\0{content}\0".encode())
+            standard = hasher.hexdigest()
+
+        parts = [name, sorted(options.items()), self.standard_tag, standard, self.schema_base_url]
+        for extension in self.extensions():
+            # A frozen version can't change, so its files aren't read, to not download them on a cache hit.
+            if extension.date:
+                parts.append([extension.id, extension.version, extension.date])
             else:
-                path += "schema/"
-            start = len(path)
-
-            cache = {}
-            for name in names[1:]:
-                if path in name:
-                    # The ocds_babel.translate.translate() function makes these substitutions for published files.
-                    cache[name[start:]] = (
-                        zipfile.read(name)
-                        .decode("utf-8")
-                        .replace("{{lang}}", language)
-                        .replace("{{version}}", ".".join(self.standard_tag.split("__")[:2]))
-                    )
+                patch = extension.remote("release-schema.json", default="{}")
+                parts.append(hashlib.sha256(patch.encode()).hexdigest())
+            if options.get("extension_field"):
+                if options.get("extension_value", "name") == "name":
+                    if not extension.date:
+                        parts.append(extension.metadata["name"].get(options["language"]))
+                else:
+                    parts.append(extension.get_url("release-schema.json"))
 
-            # Set _file_cache at once, e.g. if threaded.
-            self._file_cache[language] = cache
+        return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+    def _standard_files(self):
+        # Cache the files without substitutions, so that the archive is read once for all languages.
+        if self._file_cache is None:
+            if _is_schema_directory(self.standard_base_url):
+                self._file_cache = _SchemaDirectoryFiles(self.standard_base_url)
+                return self._file_cache
+
+            base = "standard/schema/" if self.standard_tag < "1__1__5" else "schema/"
 
-        return self._file_cache[language][basename]
+            with closing(_resolve_zip(self.standard_base_url, base)) as zipfile:
+                names = zipfile.namelist()
+
+                path = names[0] + base
+                start = len(path)
+
+                cache = {}
+                for name in names[1:]:
+                    if path in name:
+                        cache[name[start:]] = zipfile.read(name).decode("utf-8")
+
+            # Set _file_cache at once, e.g. if threaded.
+            self._file_cache = cache
+
+        return self._file_cache
+
+
+class _SchemaDirectoryFiles(Mapping):
+    # Download each file from a published schema directory on first access. A web server doesn't list a directory's
+    # files, so the index is the package schemas and the codelists that the release schema references.
+    def __init__(self, base_url):
+        self._base_url = base_url
+        self._contents = {}
+        self._names = None
+
+    def __getitem__(self, name):
+        if name not in self._contents:
+            response = session.get(f"{self._base_url}{name}")
+            # Like a ZIP archive, raise KeyError for a file that doesn't exist.
+            if response.status_code == requests.codes.not_found:
+                raise KeyError(name)
+            response.raise_for_status()
+            self._contents[name] = response.content.decode("utf-8")
+        return self._contents[name]
+
+    def __iter__(self):
+        if self._names is None:
+            codelists = set()
+            _add_codelist_names(json.loads(self["release-schema.json"]), codelists)
+            self._names = [*SCHEMAS, *(f"codelists/{name}" for name in sorted(codelists))]
+        return iter(self._names)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def _prefetch_extension(extension):
+    # Read the files that release_schema_patch() and extension_codelists() read. Choose between the base URL and the
+    # ZIP archive once, for all files. If extension.json can't be read, read release-schema.json anyway.
+    with _in_pool_thread():
+        codelists = []
+        with suppress(
+            DoesNotExist,
+            UnicodeDecodeError,
+            UnsupportedSchemeError,
+            json.JSONDecodeError,
+            requests.RequestException,
+            zipfile.BadZipFile,
+        ):
+            codelists = [f"codelists/{name}" for name in extension.metadata.get("codelists", [])]
+        extension.prefetch(["release-schema.json", *codelists])
+        extension.remote("release-schema.json", default="{}")
+        for name in codelists:
+            extension.remote(name)
+
+
+def _is_schema_directory(url):
+    return isinstance(url, str) and url.endswith("/") and urlsplit(url).scheme in {"http", "https"}
+
+
+def _add_codelist_names(schema, names):
+    if isinstance(schema, list):
+        for item in schema:
+            _add_codelist_names(item, names)
+    elif isinstance(schema, dict):
+        if isinstance(schema.get("codelist"), str):
+            names.add(schema["codelist"])
+        for value in schema.values():
+            _add_codelist_names(value, names)
+
+
+def _is_definition_or_field(pointer):
+    return len(pointer) > 1 and pointer[-2] in {"definitions", "properties"}
+
+
+def _merge(target, patch, extension, provenance, annotated, field_name=None, field_value=None, pointer=()):
+    # Merge the patch into the target, like json_merge_patch.merge(). In the same pass, record the extension that
+    # patched each definition and field, and, if field_name is set, annotate the definitions and fields that the patch
+    # defines (that is, that have a title) with field_value.
+    for key, value in patch.items():
+        path = (*pointer, key)
+        if isinstance(value, dict):
+            subtarget = target.get(key)
+            if not isinstance(subtarget, dict):
+                subtarget = target[key] = {}
+            _merge(subtarget, value, extension, provenance, annotated, field_name, field_value, path)
+            if _is_definition_or_field(path):
+                provenance[path] = extension
+                if field_name and "title" in value:
+                    subtarget[field_name] = field_value
+                    annotated.append(subtarget)
+        elif value is None:
+            target.pop(key, None)
+        else:
+            # Subschemas in arrays, like "oneOf", are annotated but not indexed. Arrays of strings, like "type",
+            # "required" and "enum", have no subschemas.
+            if field_name and isinstance(value, list) and any(isinstance(item, (dict, list)) for item in value):
+                annotated.extend(_add_extension_field(value, field_value, field_name, path))
+            target[key] = value
 
 
 def _add_extension_field(schema, extension_name, field_name, pointer=None):
+    # Return the annotated subschemas.
     if pointer is None:
         pointer = ()
+    annotated = []
     if isinstance(schema, list):
         for item in schema:
-            _add_extension_field(item, extension_name, field_name=field_name, pointer=pointer)
+            annotated.extend(_add_extension_field(item, extension_name, field_name=field_name, pointer=pointer))
     elif isinstance(schema, dict):
         if len(pointer) > 1 and pointer[-2] in {"definitions", "properties"} and "title" in schema:
             schema[field_name] = extension_name
+            annotated.append(schema)
         for key, value in schema.items():
-            _add_extension_field(value, extension_name, field_name=field_name, pointer=(*pointer, key))
+            annotated.extend(
+                _add_extension_field(value, extension_name, field_name=field_name, pointer=(*pointer, key))
+            )
+    return annotated
@@ -1,16 +1,19 @@
 import json
 import os
+import shutil
 import warnings
 from io import BytesIO
 from operator import attrgetter
+from tempfile import SpooledTemporaryFile
 from urllib.parse import urlsplit
-from zipfile import ZipFile
+from zipfile import ZipFile, ZipInfo
 
 import jsonref
 import requests
 from requests.adapters import HTTPAdapter
-from requests_cache import NEVER_EXPIRE, CachedSession
+from requests_cache import EXPIRE_IMMEDIATELY, NEVER_EXPIRE, CachedSession, get_expiration_datetime
 
+from ocdsextensionregistry.cache import LRUCache
 from ocdsextensionregistry.exceptions import UnknownLatestVersion
 
 # For example: "file:///C|/tmp" or "file:///tmp"
@@ -18,6 +21,12 @@ FILE_URI_OFFSET = 8 if os.name == "nt" else 7
 
 DEFAULT_MINOR_VERSION = "1.1"
 
+#: The size in bytes above which a downloaded ZIP file is written to a temporary file, instead of kept in memory.
+#:
+#: ZIP files up to this size are stored in the HTTP cache. Larger ZIP files aren't cached, because requests-cache
+#: reads the body of a response into memory to cache it.
+SPOOL_MAX_SIZE = int(os.getenv("OCDS_SPOOL_MAX_SIZE", str(5 * 1024 * 1024)))
+
 # https://requests-cache.readthedocs.io/en/stable/user_guide/troubleshooting.html#common-error-messages
 # https://docs.python.org/3/library/socket.html#constants
 warnings.filterwarnings(
@@ -26,10 +35,32 @@ warnings.filterwarnings(
     message=r"^unclosed <ssl\.SSLSocket fd=\d+, family=AddressFamily\.AF_INET6?, type=SocketKind\.SOCK_STREAM, ",
 )
 
+
+def _getenv_int(key):
+    value = os.getenv(key)
+    return int(value) if value else None
+
+
+# requests-cache gives precedence to a request's expire_after over the session's.
+_EXPIRE_AFTER = os.getenv("REQUESTS_CACHE_EXPIRE_AFTER")
+
+
+#: The maximum number of connections to save in the pool, and the default number of threads that download files.
+POOL_MAXSIZE = int(os.getenv("REQUESTS_POOL_MAXSIZE", "10"))
+
 # https://2.python-requests.org/projects/3/api/#requests.adapters.HTTPAdapter
 # https://urllib3.readthedocs.io/en/latest/advanced-usage.html#customizing-pool-behavior
-adapter = HTTPAdapter(max_retries=3, pool_maxsize=int(os.getenv("REQUESTS_POOL_MAXSIZE", "10")))
-session = CachedSession(backend="memory", expire_after=os.getenv("REQUESTS_CACHE_EXPIRE_AFTER", NEVER_EXPIRE))
+adapter = HTTPAdapter(max_retries=3, pool_maxsize=POOL_MAXSIZE)
+session = CachedSession(
+    backend=LRUCache(
+        os.getenv("REQUESTS_CACHE_NAME", "ocdsextensionregistry"),
+        backend=os.getenv("REQUESTS_CACHE_BACKEND", "memory"),
+        max_bytes=_getenv_int("REQUESTS_CACHE_MAX_BYTES"),
+        max_entries=_getenv_int("REQUESTS_CACHE_MAX_ENTRIES"),
+        use_cache_dir=True,
+    ),
+    expire_after=_EXPIRE_AFTER or NEVER_EXPIRE,
+)
 session.headers.update(
     {"User-Agent": "ocdsextensionregistry (+http://www.open-contracting.org; data@open-contracting.org)"}
 )
@@ -37,6 +68,31 @@ session.mount("https://", adapter)
 session.mount("http://", adapter)
 
 
+def configure_session(
+    backend="memory", cache_name="ocdsextensionregistry", *, max_bytes=None, max_entries=None, **kwargs
+):
+    """
+    Replace the cache backend of the HTTP session that is shared by this package's classes.
+
+    Relative cache names are resolved against the user's cache directory, like ``~/.cache/``.
+
+    :param str backend: the `requests-cache backend
+        <https://requests-cache.readthedocs.io/en/stable/user_guide/backends.html>`__, like ``'sqlite'``
+    :param str cache_name: the cache's name, database path or directory, depending on the backend
+    :param int max_bytes: the maximum total size of the responses' bodies, in bytes, after which the least recently
+        used responses are evicted
+    :param int max_entries: the maximum number of responses, after which the least recently used responses are
+        evicted
+    :param kwargs: the backend's keyword arguments
+    """
+    settings = session.settings
+    session.cache.close()
+    session.cache = LRUCache(
+        cache_name, backend=backend, max_bytes=max_bytes, max_entries=max_entries, **{"use_cache_dir": True} | kwargs
+    )
+    session.settings = settings
+
+
 def json_dump(data, io):
     """Dump JSON to a file-like object."""
     json.dump(data, io, ensure_ascii=False, indent=2)
@@ -99,7 +155,14 @@ def remove_nulls(schema):
             remove_nulls(subschema)
 
 
-def _resolve(data_or_url):
+def _request_expire_after(expire_after):
+    # If REQUESTS_CACHE_EXPIRE_AFTER is set, use the session's expiration, instead of the request's.
+    if _EXPIRE_AFTER:
+        return None
+    return expire_after
+
+
+def _resolve(data_or_url, expire_after=EXPIRE_IMMEDIATELY):
     parsed = urlsplit(data_or_url)
 
     if parsed.scheme:
@@ -107,14 +170,16 @@ def _resolve(data_or_url):
             with open(data_or_url[FILE_URI_OFFSET:]) as f:
                 return f.read()
 
-        response = session.get(data_or_url)
+        # The registry's CSV files change over time. EXPIRE_IMMEDIATELY revalidates the cached response with a
+        # conditional request (If-None-Match), instead of downloading it again.
+        response = session.get(data_or_url, expire_after=_request_expire_after(expire_after))
         response.raise_for_status()
         return response.text
 
     return data_or_url
 
 
-def _resolve_zip(url, base=""):
+def _resolve_zip(url, base="", expire_after=None):
     if isinstance(url, bytes):
         return ZipFile(BytesIO(url))
 
@@ -122,21 +187,111 @@ def _resolve_zip(url, base=""):
 
     if parsed.scheme == "file":
         if url.endswith(".zip"):
-            with open(url[FILE_URI_OFFSET:], "rb") as f:
-                io = BytesIO(f.read())
-        else:
-            io = BytesIO()
-            with ZipFile(io, "w") as zipfile:
-                zipfile.write(url[FILE_URI_OFFSET:], arcname="zip/")
-                for root, dirs, files in os.walk(os.path.join(url[FILE_URI_OFFSET:], base)):
-                    for directory in dirs:
-                        if directory == "__pycache__":
-                            dirs.remove(directory)
-                    for file in sorted(files):
-                        zipfile.write(os.path.join(root, file), arcname=f"zip/{file}")
-    else:
-        response = session.get(url, allow_redirects=True)
+            # ZipFile reads the central directory and the requested members only. The operating system's page cache
+            # is shared by processes that read the same file.
+            return ZipFile(url[FILE_URI_OFFSET:])
+        return _DirectoryArchive(url[FILE_URI_OFFSET:], base)
+
+    # If the archive is cached, read it from the cache, which revalidates it if needed.
+    if session.cache.contains(url=url):
+        response = session.get(url, allow_redirects=True, expire_after=expire_after)
+        response.raise_for_status()
+        return ZipFile(BytesIO(response.content))
+
+    # Otherwise, download it without the cache, which would read the whole body into memory, and write it to a
+    # temporary file if it is large. ("no-store" skips writing to the cache, and implies skipping reading from it.)
+    with session.get(url, allow_redirects=True, headers={"Cache-Control": "no-store"}, stream=True) as response:
         response.raise_for_status()
-        io = BytesIO(response.content)
+        io = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)  # noqa: SIM115 # closed by _SpooledZipFile
+        try:
+            size = 0
+            for chunk in response.iter_content(chunk_size=65536):
+                size += io.write(chunk)
+            io.seek(0)
+            # If the archive is small, cache it.
+            if size <= SPOOL_MAX_SIZE:
+                content = io.read()
+                io.close()
+                _save_response(response, content, expire_after)
+                return ZipFile(BytesIO(content))
+            return _SpooledZipFile(io)
+        except BaseException:
+            io.close()
+            raise
+
+
+def _save_response(response, content, expire_after):
+    if session.settings.disabled or session.settings.read_only:
+        return
+    if expire_after is None:
+        expire_after = session.settings.expire_after
+    # Like requests-cache, don't cache a response that expires immediately, unless it can be revalidated.
+    if (
+        expire_after == EXPIRE_IMMEDIATELY
+        and "ETag" not in response.headers
+        and "Last-Modified" not in response.headers
+    ):
+        return
+    response._content = content  # noqa: SLF001
+    session.cache.save_response(response, expires=get_expiration_datetime(expire_after))
+
+
+class _SpooledZipFile(ZipFile):
+    # ZipFile doesn't close a file object that it didn't open.
+    def close(self):
+        fp = self.fp
+        super().close()
+        if fp is not None:
+            fp.close()
+
+
+class _DirectoryInfo(ZipInfo):
+    __slots__ = ("path",)
+
+
+class _DirectoryArchive:
+    # Provide the read interface of ZipFile over a directory, like a ZIP archive from GitHub, in which all names are
+    # prefixed by a top-level directory, "zip/". This avoids compressing and decompressing the files.
+    def __init__(self, directory, base=""):
+        self._paths = {"zip/": directory}
+        for root, dirs, files in os.walk(os.path.join(directory, base)):
+            dirs[:] = sorted(name for name in dirs if name != "__pycache__")
+            for file in sorted(files):
+                path = os.path.join(root, file)
+                self._paths[f"zip/{os.path.relpath(path, directory).replace(os.sep, '/')}"] = path
+
+    def namelist(self):
+        return list(self._paths)
+
+    def infolist(self):
+        infos = []
+        for name, path in self._paths.items():
+            info = _DirectoryInfo(name)
+            info.path = path
+            infos.append(info)
+        return infos
+
+    def open(self, name):
+        return open(self._path(name), "rb")
+
+    def read(self, name):
+        with self.open(name) as f:
+            return f.read()
+
+    def extract(self, member, path):
+        # Like ZipFile.extract(), use the member's filename, which the caller can change.
+        target = os.path.join(path, member.filename)
+        if member.is_dir():
+            os.makedirs(target, exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(member.path, target)
+        return target
+
+    def close(self):
+        pass
 
-    return ZipFile(io)
+    def _path(self, name):
+        if isinstance(name, _DirectoryInfo):
+            return name.path
+        return self._paths[name]
@@ -1,10 +1,13 @@
+import json
 import logging
 import os
 import sys
 from glob import glob
+from pathlib import Path
 
 import pytest
 
+from ocdsextensionregistry import ExtensionRegistry
 from ocdsextensionregistry.__main__ import main
 
 args = ["ocdsextensionregistry", "download"]
@@ -44,6 +47,45 @@ def test_command_versions(capsys, monkeypatch, tmpdir):
     assert len(tree[1][1]) > 1
 
 
+def test_command_registry_snapshot(capsys, monkeypatch, tmpdir, caplog):
+    output_dir = tmpdir.mkdir("outputdir")
+    file = tmpdir.join("extension_versions.csv")
+    extensions_file = tmpdir.join("extensions.csv")
+    snapshot = tmpdir.join("registry.json")
+
+    file.write("Id,Date,Version,Base URL,Download URL\nlocation,,v1.1.4,http://example.com/,")
+    extensions_file.write("Id,Category,Core\nlocation,item,true")
+
+    calls = []
+    init = ExtensionRegistry.__init__
+    monkeypatch.setattr(ExtensionRegistry, "__init__", lambda *args: calls.append(args) or init(*args))
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            *args,
+            "--extension-versions-url",
+            Path(file).as_uri(),
+            "--extensions-url",
+            Path(extensions_file).as_uri(),
+            "--registry-snapshot",
+            str(snapshot),
+            str(output_dir),
+            "location==v1.1.4",
+        ],
+    )
+
+    # The first run writes the snapshot, and the second run reads it.
+    for _ in range(2):
+        main()
+
+        assert capsys.readouterr().out == ""
+        assert caplog.records[-1].message == "Not downloading location==v1.1.4 (no Download URL)"
+        assert json.loads(snapshot.read())["versions"][0][:3] == ["location", "", "v1.1.4"]
+
+    assert len(calls) == 1
+
+
 # Take the strictest of restrictions.
 def test_command_versions_collision(capsys, monkeypatch, tmpdir):
     monkeypatch.setattr(sys, "argv", [*args, str(tmpdir), "location==v1.1.4", "location"])
@@ -0,0 +1,149 @@
+import pytest
+from requests_cache import CachedResponse
+from requests_cache.backends.sqlite import SQLiteDict
+
+from ocdsextensionregistry.cache import LRUCache
+from ocdsextensionregistry.util import configure_session, session
+
+
+def response(size):
+    return CachedResponse(content=b"x" * size, status_code=200)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_bytes=10)
+
+    cache.responses["a"] = response(4)
+    cache.responses["b"] = response(4)
+    cache.responses["a"]
+    cache.responses["c"] = response(4)
+
+    assert list(cache.responses) == ["a", "c"]
+    assert cache.responses.size == 8
+
+
+def test_lru_cache_skips_large_response():
+    cache = LRUCache(max_bytes=10)
+
+    cache.responses["a"] = response(4)
+    cache.responses["b"] = response(11)
+
+    assert list(cache.responses) == ["a"]
+    assert cache.responses.size == 4
+
+
+def test_lru_cache_max_entries():
+    cache = LRUCache(max_entries=2)
+
+    cache.responses["a"] = response(1)
+    cache.responses["b"] = response(1)
+    cache.responses["c"] = response(1)
+
+    assert list(cache.responses) == ["b", "c"]
+    assert cache.responses.size == 2
+
+
+def test_lru_cache_hits_and_misses():
+    cache = LRUCache()
+    cache.responses["a"] = response(1)
+
+    assert cache.get_response("a") is not None
+    assert cache.get_response("b") is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_lru_cache_unbounded():
+    cache = LRUCache()
+
+    for key in "abc":
+        cache.responses[key] = response(100)
+
+    assert len(cache.responses) == 3
+    assert cache.responses.size == 300
+
+
+def test_lru_cache_persistent(tmp_path):
+    cache_name = str(tmp_path / "http_cache")
+
+    cache = LRUCache(cache_name, backend="sqlite", max_bytes=10)
+    cache.responses["a"] = response(4)
+    cache.responses["b"] = response(4)
+    cache.close()
+
+    cache = LRUCache(cache_name, backend="sqlite", max_bytes=10)
+    assert cache.responses.size == 8
+
+    cache.responses["c"] = response(4)
+    assert sorted(cache.responses) == ["b", "c"]
+    cache.close()
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "filesystem"])
+def test_lru_cache_persistent_recency(tmp_path, backend):
+    cache_name = str(tmp_path / "http_cache")
+
+    cache = LRUCache(cache_name, backend=backend, max_bytes=10)
+    cache.responses["a"] = response(4)
+    cache.responses["b"] = response(4)
+    cache.responses["a"]
+    cache.close()
+
+    cache = LRUCache(cache_name, backend=backend, max_bytes=10)
+    cache.responses["c"] = response(4)
+    assert sorted(cache.responses) == ["a", "c"]
+    cache.close()
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "filesystem"])
+def test_lru_cache_persistent_clear(tmp_path, backend):
+    cache_name = str(tmp_path / "http_cache")
+
+    cache = LRUCache(cache_name, backend=backend, max_entries=5)
+    cache.responses["a"] = response(4)
+    cache.redirects["b"] = "a"
+    cache.clear()
+
+    assert list(cache.responses) == []
+    assert list(cache.redirects) == []
+    assert cache.responses.size == 0
+
+    cache.responses["c"] = response(4)
+    cache.close()
+
+    cache = LRUCache(cache_name, backend=backend, max_entries=5)
+    assert list(cache.responses) == ["c"]
+    assert cache.responses.size == 4
+    cache.close()
+
+
+@pytest.mark.parametrize("max_bytes", [None, 10])
+def test_lru_cache_persistent_no_reads(tmp_path, monkeypatch, max_bytes):
+    cache_name = str(tmp_path / "http_cache")
+
+    cache = LRUCache(cache_name, backend="sqlite", max_bytes=max_bytes)
+    cache.responses["a"] = response(4)
+    cache.close()
+
+    def fail(self, key):
+        raise AssertionError
+
+    monkeypatch.setattr(SQLiteDict, "__getitem__", fail)
+
+    cache = LRUCache(cache_name, backend="sqlite", max_bytes=max_bytes)
+    assert list(cache.responses) == ["a"]
+    cache.close()
+
+
+def test_configure_session(tmp_path):
+    original = session.cache
+    expire_after = session.settings.expire_after
+    try:
+        configure_session("sqlite", str(tmp_path / "http_cache"), max_bytes=10)
+
+        assert session.cache.backend.db_path == tmp_path / "http_cache.sqlite"
+        assert session.cache.responses.max_bytes == 10
+        assert session.settings.expire_after == expire_after
+    finally:
+        session.cache.close()
+        session.cache = original
@@ -3,7 +3,7 @@ from pathlib import Path
 import pytest
 
 from ocdsextensionregistry import ExtensionRegistry
-from ocdsextensionregistry.exceptions import DoesNotExist, MissingExtensionMetadata
+from ocdsextensionregistry.exceptions import DoesNotExist, MissingExtensionMetadata, UnsupportedSnapshotError
 
 extensions_url = "https://raw.githubusercontent.com/open-contracting/extension_registry/main/extensions.csv"
 extension_versions_url = (
@@ -216,3 +216,102 @@ def test_iter():
         pass
 
     assert i == 14
+
+
+def test_filter_indexed():
+    obj = ExtensionRegistry(extension_versions_data, extensions_data)
+
+    assert [version.version for version in obj.filter(id="lots")] == ["master", "v1.1", "v1.1.1", "v1.1.3"]
+    assert [version.id for version in obj.filter(version="v1.1.3", core=True)] == ["enquiries", "location", "lots"]
+    assert obj.filter(id="lots", version="v1.1.3", date="2018-02-01") == []
+    assert obj.filter(id="nonexistent") == []
+
+
+def test_dump_load(tmp_path):
+    path = tmp_path / "registry.json"
+    obj = ExtensionRegistry(extension_versions_data, extensions_data)
+    obj.dump(path)
+
+    result = ExtensionRegistry.load(path)
+
+    assert result.key == obj.key
+    assert [version.as_dict() for version in result] == [version.as_dict() for version in obj]
+    assert result.get(id="lots", version="v1.1.3").core is True
+
+
+def test_dump_load_without_extensions(tmp_path):
+    path = tmp_path / "registry.json"
+    ExtensionRegistry(extension_versions_data).dump(path)
+
+    result = ExtensionRegistry.load(path)
+
+    assert result.versions[0].as_dict() == ExtensionRegistry(extension_versions_data).versions[0].as_dict()
+    with pytest.raises(MissingExtensionMetadata):
+        result.filter(category="tender")
+
+
+def test_load_with_data(tmp_path):
+    path = tmp_path / "registry.json"
+
+    obj = ExtensionRegistry.load(path, extension_versions_data, extensions_data)
+    assert path.exists()
+    assert len(obj.versions) == 14
+
+    # The snapshot is reused if the data is unchanged.
+    path.write_text(path.read_text().replace("2018-01-30", "2000-01-01"))
+    obj = ExtensionRegistry.load(path, extension_versions_data, extensions_data)
+    assert obj.versions[-1].date == "2000-01-01"
+
+    # The snapshot is rewritten if the data is changed.
+    obj = ExtensionRegistry.load(path, extension_versions_data.replace("2018-01-30", "2018-01-31"), extensions_data)
+    assert obj.versions[-1].date == "2018-01-31"
+    assert ExtensionRegistry.load(path).versions[-1].date == "2018-01-31"
+
+
+def test_load_unsupported(tmp_path):
+    path = tmp_path / "registry.json"
+    path.write_text('{"version": 0}')
+
+    with pytest.raises(UnsupportedSnapshotError):
+        ExtensionRegistry.load(path)
+
+
+def test_refresh():
+    obj = ExtensionRegistry(extension_versions_data, extensions_data)
+    master = obj.get(id="lots", version="master")
+    v113 = obj.get(id="lots", version="v1.1.3")
+    v111 = obj.get(id="lots", version="v1.1.1")
+
+    assert obj.refresh() is False
+
+    data = extension_versions_data.replace("2018-01-30", "2018-01-31").replace(
+        "lots,2017-08-07,v1.1.1,https://raw.githubusercontent.com/open-contracting-extensions/ocds_lots_extension/v1.1.1/,https://api.github.com/repos/open-contracting-extensions/ocds_lots_extension/zipball/v1.1.1\n",
+        "",
+    )
+
+    assert obj.refresh(data, extensions_data.replace("lots,tender,true", "lots,tender,")) is True
+    assert len(obj.versions) == 13
+    assert obj.get(id="lots", version="master") is master
+    assert master.core is False
+    assert obj.get(id="lots", version="v1.1.3") is not v113
+    assert obj.get(id="lots", version="v1.1.3").date == "2018-01-31"
+    assert v111 not in obj.filter(id="lots")
+    assert obj.filter(id="lots", core=True) == []
+
+
+def test_latest_versions():
+    obj = ExtensionRegistry(extension_versions_data.replace("lots,,master", "lots,,"), extensions_data)
+
+    result = obj.latest_versions()
+
+    assert {key: value.version for key, value in result.items()} == {
+        "charges": "master",
+        "enquiries": "master",
+        "location": "master",
+        "lots": "v1.1.3",
+    }
+    assert obj.latest_versions() == result
+
+    obj.refresh(extension_versions_data, extensions_data)
+
+    assert obj.latest_versions()["lots"].version == "master"
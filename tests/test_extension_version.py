@@ -1,11 +1,14 @@
 import json
+import zipfile
 from pathlib import Path
 
 import pytest
 import requests
+from requests_cache import EXPIRE_IMMEDIATELY, NEVER_EXPIRE
 
-from ocdsextensionregistry import Extension, ExtensionVersion
+from ocdsextensionregistry import Extension, ExtensionVersion, extension_version, util
 from ocdsextensionregistry.exceptions import DoesNotExist, NotAvailableInBulk
+from ocdsextensionregistry.extension_version import REPOSITORY_HOSTS, RepositoryHost, hydrate
 
 
 def arguments(**kwargs):
@@ -77,6 +80,26 @@ def test_repr_url_pattern():
     assert repr(obj) == "https://example.com/?file={4F434453}&key=value"
 
 
+def test_expire_after_frozen():
+    obj = ExtensionVersion(arguments())
+
+    assert obj._expire_after == NEVER_EXPIRE  # noqa: SLF001
+
+
+def test_expire_after_live():
+    obj = ExtensionVersion(arguments(Date="", Version="master"))
+
+    assert obj._expire_after == EXPIRE_IMMEDIATELY  # noqa: SLF001
+
+
+def test_expire_after_environment(monkeypatch):
+    monkeypatch.setattr(util, "_EXPIRE_AFTER", "3600")
+    obj = ExtensionVersion(arguments())
+
+    # The session's expiration is used.
+    assert obj._expire_after is None  # noqa: SLF001
+
+
 def test_update():
     obj = ExtensionVersion(arguments())
     obj.update(Extension({"Id": "location", "Category": "item", "Core": "true"}))
@@ -108,6 +131,16 @@ def test_as_dict():
     }
 
 
+def test_allow_schemes():
+    obj = ExtensionVersion(arguments())
+    other = ExtensionVersion(arguments())
+    obj.allow_schemes.add("file")
+
+    assert obj.allow_schemes == {"http", "https", "file"}
+    assert other.allow_schemes == {"http", "https"}
+    assert not hasattr(obj, "__dict__")
+
+
 @pytest.mark.parametrize(
     ("args", "expected"),
     [
@@ -255,6 +288,23 @@ def test_remote_codelists_only_base_url():
     assert obj.remote("release-schema.json", default="{}") == "{}"
 
 
+def test_remote_missing(monkeypatch):
+    args = dict.fromkeys(["Id", "Date", "Version", "Base URL", "Download URL"])
+    args["Base URL"] = "https://raw.githubusercontent.com/contratacionesabiertas/ocds_publicNotices_extension/master/"
+
+    obj = ExtensionVersion(args)
+    obj.download_url = None
+
+    assert obj.remote("release-schema.json", default="{}") == "{}"
+
+    def get(*args, **kwargs):
+        raise AssertionError("unexpected request")
+
+    monkeypatch.setattr("ocdsextensionregistry.extension_version.session.get", get)
+
+    assert obj.remote("release-schema.json", default="{}") == "{}"
+
+
 def test_remote_codelists_only_download_url():
     args = dict.fromkeys(["Id", "Date", "Version", "Base URL", "Download URL"])
     args["Download URL"] = (
@@ -277,6 +327,65 @@ def test_files():
         assert isinstance(value, (bytes, str))
 
 
+def test_files_lazy(tmpdir):
+    path = tmpdir.join("extension.zip")
+    with zipfile.ZipFile(path, "w") as f:
+        f.writestr("ocds_location_extension-1.1.3/", "")
+        f.writestr("ocds_location_extension-1.1.3/extension.json", '{"key": "value"}')
+        f.writestr("ocds_location_extension-1.1.3/README.md", "# Location")
+        f.writestr("ocds_location_extension-1.1.3/.gitignore", "")
+
+    obj = ExtensionVersion(arguments(**{"Download URL": Path(path).as_uri()}))
+    obj.allow_schemes.add("file")
+    result = obj.files
+
+    assert list(result) == ["extension.json", "README.md"]
+    assert "README.md" in result
+    assert ".gitignore" not in result
+
+    assert json.loads(result["extension.json"]) == {"key": "value"}
+    assert result._contents == {"extension.json": '{"key": "value"}'}  # noqa: SLF001
+
+    obj.close_zipfile()
+
+    assert result["README.md"] == "# Location"
+
+
+def test_files_directory(tmpdir):
+    tmpdir.join("extension.json").write('{"key": "value"}')
+    tmpdir.mkdir("codelists").join("a.csv").write("Code\nb\n")
+    tmpdir.mkdir("__pycache__").join("x.pyc").write("")
+
+    obj = ExtensionVersion(arguments(**{"Download URL": Path(tmpdir).as_uri()}))
+    obj.allow_schemes.add("file")
+
+    assert dict(obj.files) == {"codelists/a.csv": "Code\nb\n", "extension.json": '{"key": "value"}'}
+
+
+def test_hydrate(tmpdir):
+    directory = tmpdir.mkdir("extension")
+    directory.join("extension.json").write('{"name": "Location", "codelists": ["a.csv"]}')
+    directory.mkdir("codelists").join("a.csv").write("Code\nb\n")
+
+    obj = ExtensionVersion(arguments(**{"Download URL": Path(directory).as_uri()}))
+    obj.allow_schemes.add("file")
+    other = ExtensionVersion(arguments(**{"Download URL": Path(tmpdir.join("nonexistent.zip")).as_uri()}))
+    other.allow_schemes.add("file")
+
+    errors = hydrate([obj, other], max_workers=2)
+
+    assert list(errors) == [other]
+    assert isinstance(errors[other], FileNotFoundError)
+    assert obj._metadata["name"] == {"en": "Location"}  # noqa: SLF001
+    assert [codelist.name for codelist in obj._codelists.values()] == ["a.csv"]  # noqa: SLF001
+    assert obj._schemas == {}  # noqa: SLF001
+
+
+def test_hydrate_unknown_part():
+    with pytest.raises(ValueError, match="unknown parts: readme"):
+        hydrate([], parts=("metadata", "readme"))
+
+
 def test_files_without_download_url():
     obj = ExtensionVersion(arguments())
     obj.download_url = None
@@ -305,6 +414,21 @@ def test_metadata_old_format():
     assert result["compatibility"] == ["1.1"]
 
 
+def test_metadata_without_zipfile():
+    download_url = "https://github.com/open-contracting-extensions/ocds_location_extension/archive/v1.1.3.zip"
+
+    obj = ExtensionVersion(arguments(**{"Download URL": download_url}))
+    result = obj.metadata
+
+    assert result["codelists"] == ["locationGazetteers.csv", "geometryType.csv"]
+    assert json.loads(obj.remote("release-schema.json"))
+    assert obj._files is None  # noqa: SLF001
+
+    # Reading more files than RAW_FILES_MAX reads the ZIP archive.
+    assert len(obj.codelists) == 2
+    assert obj._files is not None  # noqa: SLF001
+
+
 def test_schemas():
     download_url = "https://github.com/open-contracting-extensions/ocds_location_extension/archive/master.zip"
 
@@ -355,6 +479,69 @@ def test_codelists():
     ]
 
 
+def test_codelists_without_download_url():
+    obj = ExtensionVersion(arguments())
+    obj.download_url = None
+    result = obj.codelists
+
+    assert len(result) == 2
+    assert result["geometryType.csv"].fieldnames == ["Code", "Title", "Description"]
+    assert set(obj.files) == {"extension.json", "codelists/locationGazetteers.csv", "codelists/geometryType.csv"}
+
+
+def fake_get(calls, files):
+    def get(url, **kwargs):
+        calls.append(url)
+        response = requests.Response()
+        basename = url.rsplit("/", 1)[-1]
+        if basename in files:
+            response.status_code = 200
+            response._content = files[basename].encode()  # noqa: SLF001
+        else:
+            response.status_code = 404
+        return response
+
+    return get
+
+
+def test_schemas_without_download_url_missing(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        extension_version.session, "get", fake_get(calls, {"extension.json": "{}", "release-schema.json": "{}"})
+    )
+    obj = ExtensionVersion(arguments(**{"Base URL": "http://example.com/", "Download URL": None}))
+
+    assert obj.schemas == {"release-schema.json": {}}
+    # Each file is requested once.
+    assert sorted(calls) == [
+        "http://example.com/extension.json",
+        "http://example.com/record-package-schema.json",
+        "http://example.com/release-package-schema.json",
+        "http://example.com/release-schema.json",
+    ]
+
+
+def test_hydrate_without_download_url(monkeypatch):
+    calls = []
+    executors = []
+    monkeypatch.setattr(
+        extension_version.session, "get", fake_get(calls, {"extension.json": "{}", "release-schema.json": "{}"})
+    )
+    executor = extension_version.ThreadPoolExecutor
+    monkeypatch.setattr(
+        extension_version, "ThreadPoolExecutor", lambda **kwargs: executors.append(kwargs) or executor(**kwargs)
+    )
+    versions = [
+        ExtensionVersion(arguments(Id=name, **{"Base URL": f"http://example.com/{name}/", "Download URL": None}))
+        for name in ("a", "b")
+    ]
+
+    assert hydrate(versions, parts=("schemas",)) == {}
+    # The threads of hydrate() don't start threads.
+    assert len(executors) == 1
+    assert len(calls) == 8
+
+
 def test_codelists_without_metadata():
     download_url = "https://api.github.com/repos/open-contracting-extensions/ocds_location_extension/zipball/v1.1"
 
@@ -454,3 +641,37 @@ def test_repository_ref_download_url():
     result = obj.repository_ref_download_url
 
     assert result == "https://github.com/open-contracting-extensions/ocds_location_extension/archive/v1.1.3.zip"
+
+
+def test_repository_ref_no_match():
+    obj = ExtensionVersion(arguments(**{"Base URL": "https://raw.githubusercontent.com/owner/repo/"}))
+
+    assert obj.repository_full_name == "owner/repo"
+    with pytest.raises(AttributeError) as excinfo:
+        obj.repository_ref  # noqa: B018
+
+    assert str(excinfo.value) == r"/owner/repo/ !~ \A/[^/]+/[^/]+/([^/]+)/[^/]*\Z"
+
+
+def test_repository_host(monkeypatch):
+    host = RepositoryHost(
+        "codeberg.org",
+        {
+            "full_name": r"\A/([^/]+/[^/]+)",
+            "name": r"\A/[^/]+/([^/]+)",
+            "user": r"\A/([^/]+)",
+            "ref": r"\A/[^/]+/[^/]+/raw/branch/([^/]+)/",
+        },
+        html_page_prefix="https://codeberg.org/",
+        url_prefix="https://codeberg.org/",
+        url_suffix=".git",
+        download_format="https://codeberg.org/{full_name}/archive/{ref}.zip",
+    )
+    monkeypatch.setattr("ocdsextensionregistry.extension_version.REPOSITORY_HOSTS", [*REPOSITORY_HOSTS, host])
+
+    obj = ExtensionVersion(
+        arguments(**{"Base URL": "https://codeberg.org/owner/repo/raw/branch/main/", "Download URL": None})
+    )
+
+    assert obj.repository_html_page == "https://codeberg.org/owner/repo"
+    assert obj.download_url == "https://codeberg.org/owner/repo/archive/main.zip"
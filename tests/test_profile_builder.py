@@ -1,10 +1,15 @@
 import json
 import logging
+from io import BytesIO
 from pathlib import Path
+from zipfile import ZipFile
 
+import json_merge_patch
 import pytest
+import requests
+from requests_cache import CachedResponse
 
-from ocdsextensionregistry import ProfileBuilder
+from ocdsextensionregistry import ExtensionVersion, ProfileBuilder, extension_version, profile_builder
 from ocdsextensionregistry.exceptions import ExtensionWarning
 from tests import path
 
@@ -60,6 +65,20 @@ def test_extensions():
     }
 
 
+def test_extensions_cached():
+    builder = ProfileBuilder(
+        None,
+        [
+            "https://raw.githubusercontent.com/open-contracting-extensions/ocds_location_extension/v1.1.4/",
+            "https://example.com/release-schema.json",
+        ],
+    )
+    result = list(builder.extensions())
+
+    assert len(result) == 2
+    assert all(a is b for a, b in zip(result, builder.extensions(), strict=True))
+
+
 def test_release_schema_patch():
     # Use the ppp extension to test null values.
     builder = ProfileBuilder(
@@ -288,6 +307,26 @@ def test_standard_codelists():
     assert result[0][0]["Deprecated"] == ""
 
 
+def test_standard_file_contents_schema_directory_missing(monkeypatch):
+    response = requests.Response()
+    response.status_code = 404
+    monkeypatch.setattr(profile_builder.session, "get", lambda *args, **kwargs: response)
+    builder = ProfileBuilder("1__1__4", {}, standard_base_url="https://standard.open-contracting.org/schema/1__1__4/")
+
+    assert "nonexistent.json" not in builder._standard_files()  # noqa: SLF001
+    with pytest.raises(KeyError):
+        builder.get_standard_file_contents("nonexistent.json")
+
+
+def test_standard_codelists_schema_directory():
+    builder = ProfileBuilder("1__1__4", {}, standard_base_url="https://standard.open-contracting.org/schema/1__1__4/")
+    result = builder.standard_codelists()
+
+    assert [codelist.name for codelist in result] == standard_codelists
+    assert result[0].name == "awardCriteria.csv"
+    assert result[0][0]["Code"] == "priceOnly"
+
+
 def test_extension_codelists(caplog):
     caplog.set_level(logging.INFO, logger="ocdsextensionregistry")
 
@@ -400,3 +439,289 @@ def test_get_standard_file_contents():
     data = builder.get_standard_file_contents("release-schema.json")
 
     assert json.loads(data)
+
+
+def test_get_standard_file_contents_directory(tmpdir):
+    tmpdir.mkdir("schema").join("release-schema.json").write('{"id": "{{lang}}/{{version}}"}')
+
+    builder = ProfileBuilder("1__1__5", {}, standard_base_url=Path(tmpdir).as_uri())
+    data = builder.get_standard_file_contents("release-schema.json", language="es")
+
+    assert json.loads(data) == {"id": "es/1.1"}
+
+    # The archive is read once for all languages.
+    tmpdir.join("schema", "release-schema.json").remove()
+    data = builder.get_standard_file_contents("release-schema.json", language="fr")
+
+    assert json.loads(data) == {"id": "fr/1.1"}
+
+
+def local_builder(tmpdir, date="", **kwargs):
+    tmpdir.mkdir("standard").mkdir("schema").join("release-schema.json").write('{"definitions": {}}')
+    extension = tmpdir.mkdir("extension")
+    extension.join("extension.json").write('{"name": "Lots", "codelists": ["+a.csv"]}')
+    extension.join("release-schema.json").write('{"definitions": {"Lot": {"type": "object"}}}')
+    extension.mkdir("codelists").join("+a.csv").write("Code\nb\n")
+    tmpdir.mkdir("registry").join("extension_versions.csv").write(
+        f"Id,Date,Version,Base URL,Download URL\nlots,{date},master,,{Path(extension).as_uri()}\n"
+    )
+
+    builder = ProfileBuilder(
+        "1__1__5",
+        {"lots": "master"},
+        registry_base_url=f"{Path(tmpdir.join('registry')).as_uri()}/",
+        standard_base_url=Path(tmpdir.join("standard")).as_uri(),
+        **kwargs,
+    )
+    builder.registry.get(id="lots", version="master").allow_schemes.add("file")
+    return builder
+
+
+def test_patched_release_schema_cached(tmpdir, monkeypatch):
+    builder = local_builder(tmpdir)
+
+    calls = []
+    merge = json_merge_patch.merge
+    monkeypatch.setattr(json_merge_patch, "merge", lambda *args: calls.append(args) or merge(*args))
+    patches = []
+    release_schema_patch = builder._release_schema_patch  # noqa: SLF001
+    monkeypatch.setattr(
+        builder, "_release_schema_patch", lambda *args: patches.append(args) or release_schema_patch(*args)
+    )
+
+    result = builder.patched_release_schema()
+    result["definitions"]["Lot"]["type"] = "array"
+
+    assert builder.patched_release_schema() == {"definitions": {"Lot": {"type": "object"}}}
+    assert builder.release_schema_patch() == {"definitions": {"Lot": {"type": "object"}}}
+    # The extensions' patches are merged once (by _release_schema_patch), and the patch is merged into the standard's
+    # schema once (by json_merge_patch).
+    assert len(patches) == 1
+    assert len(calls) == 1
+
+
+def test_prefetch(tmpdir):
+    builder = local_builder(tmpdir)
+    builder.prefetch(max_workers=2)
+
+    for directory in ("standard", "extension"):
+        tmpdir.join(directory).remove()
+
+    assert builder.patched_release_schema() == {"definitions": {"Lot": {"type": "object"}}}
+    assert [codelist.name for codelist in builder.extension_codelists()] == ["+a.csv"]
+
+
+def test_prefetch_extension_archive(monkeypatch):
+    io = BytesIO()
+    with ZipFile(io, "w") as f:
+        f.writestr("zip/", "")
+        f.writestr("zip/extension.json", '{"codelists": ["a.csv", "b.csv"]}')
+        f.writestr("zip/release-schema.json", "{}")
+        f.writestr("zip/codelists/a.csv", "Code\n")
+        f.writestr("zip/codelists/b.csv", "Code\n")
+
+    urls = []
+
+    def get(url, **kwargs):
+        urls.append(url)
+        if url.endswith(".zip"):
+            return CachedResponse(content=io.getvalue(), status_code=200)
+        return CachedResponse(content=b'{"codelists": ["a.csv", "b.csv"]}', status_code=200)
+
+    monkeypatch.setattr(profile_builder.session, "get", get)
+    extension = ExtensionVersion(
+        {
+            "Id": "lots",
+            "Date": "",
+            "Version": "master",
+            "Base URL": "https://example.com/lots/",
+            "Download URL": "https://example.com/lots.zip",
+        }
+    )
+    profile_builder._prefetch_extension(extension)  # noqa: SLF001
+
+    # The release schema and two codelists are more than RAW_FILES_MAX files, once extension.json is downloaded.
+    assert urls == ["https://example.com/lots/extension.json", "https://example.com/lots.zip"]
+
+
+def test_prefetch_without_download_url(monkeypatch):
+    files = {
+        "http://example.com/a/extension.json": '{"codelists": ["a.csv", "b.csv"]}',
+        "http://example.com/a/release-schema.json": "{}",
+        "http://example.com/a/codelists/a.csv": "Code\n",
+        "http://example.com/a/codelists/b.csv": "Code\n",
+        "http://example.com/b/release-schema.json": "{}",
+    }
+    urls = []
+    executors = []
+
+    def get(url, **kwargs):
+        urls.append(url)
+        if url in files:
+            return CachedResponse(content=files[url].encode(), status_code=200)
+        return CachedResponse(status_code=404)
+
+    monkeypatch.setattr(profile_builder.session, "get", get)
+    executor = extension_version.ThreadPoolExecutor
+    monkeypatch.setattr(
+        extension_version, "ThreadPoolExecutor", lambda **kwargs: executors.append(kwargs) or executor(**kwargs)
+    )
+    builder = ProfileBuilder(None, ["http://example.com/a/extension.json", "http://example.com/b/extension.json"])
+    builder.prefetch(max_workers=2)
+
+    # The threads of prefetch() don't start threads.
+    assert executors == []
+    # If extension.json can't be read, release-schema.json is read anyway.
+    assert sorted(urls) == [
+        "http://example.com/a/codelists/a.csv",
+        "http://example.com/a/codelists/b.csv",
+        "http://example.com/a/extension.json",
+        "http://example.com/a/release-schema.json",
+        "http://example.com/b/extension.json",
+        "http://example.com/b/release-schema.json",
+    ]
+
+
+def test_cache_dir(tmpdir, monkeypatch):
+    cache_dir = tmpdir.join("cache")
+    expected = {"definitions": {"Lot": {"type": "object", "title": "Lot", "lots": "Lots"}}}
+
+    tmpdir.mkdir("first")
+    builder = local_builder(tmpdir.join("first"), cache_dir=str(cache_dir))
+    tmpdir.join("first", "extension", "release-schema.json").write(
+        '{"definitions": {"Lot": {"type": "object", "title": "Lot"}}}'
+    )
+
+    assert builder.patched_release_schema(extension_field="lots") == expected
+    assert len(cache_dir.listdir()) == 2  # the patch and the patched schema
+
+    builder = ProfileBuilder(
+        builder.standard_tag,
+        builder.extension_versions,
+        builder.registry_base_url,
+        builder.standard_base_url,
+        cache_dir=str(cache_dir),
+    )
+    builder.registry.get(id="lots", version="master").allow_schemes.add("file")
+
+    calls = []
+    merge = json_merge_patch.merge
+    monkeypatch.setattr(json_merge_patch, "merge", lambda *args: calls.append(args) or merge(*args))
+    patches = []
+    release_schema_patch = builder._release_schema_patch  # noqa: SLF001
+    monkeypatch.setattr(
+        builder, "_release_schema_patch", lambda *args: patches.append(args) or release_schema_patch(*args)
+    )
+
+    # Neither the extensions' patches nor the patch and the standard's schema are merged.
+    assert builder.patched_release_schema(extension_field="lots") == expected
+    assert patches == []
+    assert calls == []
+
+    # A different option builds new artifacts.
+    builder.patched_release_schema()
+    assert len(patches) == 1
+    assert len(calls) == 1
+
+
+def test_cache_dir_frozen(tmpdir):
+    cache_dir = tmpdir.join("cache")
+    expected = {"definitions": {"Lot": {"type": "object", "title": "Lot", "lots": "Lots"}}}
+
+    tmpdir.mkdir("first")
+    builder = local_builder(tmpdir.join("first"), date="2020-01-01", cache_dir=str(cache_dir))
+    tmpdir.join("first", "extension", "release-schema.json").write(
+        '{"definitions": {"Lot": {"type": "object", "title": "Lot"}}}'
+    )
+
+    assert builder.patched_release_schema(extension_field="lots") == expected
+
+    # The files of a frozen version aren't read on a cache hit.
+    tmpdir.join("first", "extension").remove()
+    builder = ProfileBuilder(
+        builder.standard_tag,
+        builder.extension_versions,
+        builder.registry_base_url,
+        builder.standard_base_url,
+        cache_dir=str(cache_dir),
+    )
+
+    assert builder.patched_release_schema(extension_field="lots") == expected
+
+
+def test_schema_provenance(tmpdir):
+    builder = local_builder(tmpdir)
+    tmpdir.join("extension", "release-schema.json").write(
+        '{"definitions": {"Lot": {"title": "Lot", "properties": '
+        '{"id": {"title": "ID"}, "value": {"type": "number"}}}}}'
+    )
+    extension = builder.registry.get(id="lots", version="master")
+
+    assert builder.release_schema_patch(extension_field="extension") == {
+        "definitions": {
+            "Lot": {
+                "title": "Lot",
+                "properties": {
+                    "id": {"title": "ID", "extension": "Lots"},
+                    "value": {"type": "number"},
+                },
+                "extension": "Lots",
+            }
+        }
+    }
+    # The plain patch is derived from the same merge.
+    assert builder.release_schema_patch() == {
+        "definitions": {
+            "Lot": {"title": "Lot", "properties": {"id": {"title": "ID"}, "value": {"type": "number"}}},
+        }
+    }
+    assert builder.schema_provenance() == {
+        "/definitions/Lot": extension,
+        "/definitions/Lot/properties/id": extension,
+        "/definitions/Lot/properties/value": extension,
+    }
+
+
+def test_release_schema_patch_lists(tmpdir):
+    builder = local_builder(tmpdir)
+    tmpdir.join("extension", "release-schema.json").write(
+        json.dumps(
+            {
+                "definitions": {
+                    "Lot": {
+                        "title": "Lot",
+                        "type": ["object", "null"],
+                        "required": ["id"],
+                        "properties": {"status": {"title": "Status", "enum": ["active", None]}},
+                        "oneOf": [{"properties": {"id": {"title": "ID"}}}],
+                    }
+                }
+            }
+        )
+    )
+
+    assert builder.release_schema_patch(extension_field="extension") == {
+        "definitions": {
+            "Lot": {
+                "title": "Lot",
+                "type": ["object", "null"],
+                "required": ["id"],
+                "properties": {"status": {"title": "Status", "enum": ["active", None], "extension": "Lots"}},
+                "oneOf": [{"properties": {"id": {"title": "ID", "extension": "Lots"}}}],
+                "extension": "Lots",
+            }
+        }
+    }
+    # The plain patch is derived from the same merge.
+    assert (None, None, None) in builder._patch_cache  # noqa: SLF001
+    assert builder.release_schema_patch() == {
+        "definitions": {
+            "Lot": {
+                "title": "Lot",
+                "type": ["object", "null"],
+                "required": ["id"],
+                "properties": {"status": {"title": "Status", "enum": ["active", None]}},
+                "oneOf": [{"properties": {"id": {"title": "ID"}}}],
+            }
+        }
+    }
@@ -1,8 +1,17 @@
+import threading
+from contextlib import closing
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+from zipfile import ZipFile
+
 import pytest
+from requests_cache import NEVER_EXPIRE
 
-from ocdsextensionregistry import ExtensionVersion
+from ocdsextensionregistry import ExtensionVersion, util
 from ocdsextensionregistry.exceptions import UnknownLatestVersion
-from ocdsextensionregistry.util import get_latest_version
+from ocdsextensionregistry.util import _resolve_zip, get_latest_version
 
 
 def test_get_latest_version_one():
@@ -55,6 +64,69 @@ def test_get_latest_version_dateless():
     assert str(excinfo.value) == ""
 
 
+def test_resolve_zip_directory(tmpdir):
+    tmpdir.mkdir("schema").mkdir("codelists").join("a.csv").write("Code\n")
+    tmpdir.join("README.md").write("# Standard")
+    output = tmpdir.mkdir("output")
+
+    archive = _resolve_zip(Path(tmpdir).as_uri(), "schema")
+
+    assert archive.namelist() == ["zip/", "zip/schema/codelists/a.csv"]
+    assert archive.read("zip/schema/codelists/a.csv") == b"Code\n"
+
+    info = archive.infolist()[1]
+    info.filename = "a.csv"
+    archive.extract(info, output)
+
+    assert output.join("a.csv").read() == "Code\n"
+
+
+def test_resolve_zip_file(tmpdir):
+    path = tmpdir.join("standard.zip")
+    with ZipFile(path, "w") as f:
+        f.writestr("zip/schema/release-schema.json", "{}")
+
+    with closing(_resolve_zip(Path(path).as_uri())) as archive:
+        assert archive.filename == str(path)
+        assert archive.read("zip/schema/release-schema.json") == b"{}"
+
+
+@pytest.fixture
+def server(tmpdir):
+    handler = partial(SimpleHTTPRequestHandler, directory=str(tmpdir))
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_port}/"
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+@pytest.mark.parametrize(("spool_max_size", "cached"), [(1, False), (1024 * 1024, True)])
+def test_resolve_zip_url(tmpdir, monkeypatch, server, spool_max_size, cached):
+    with ZipFile(tmpdir.join("standard.zip"), "w") as f:
+        f.writestr("zip/schema/release-schema.json", "{}")
+    url = f"{server}standard.zip"
+    monkeypatch.setattr(util, "SPOOL_MAX_SIZE", spool_max_size)
+
+    try:
+        with closing(_resolve_zip(url, expire_after=NEVER_EXPIRE)) as archive:
+            assert archive.read("zip/schema/release-schema.json") == b"{}"
+            # A large archive is written to a temporary file, and isn't cached.
+            assert isinstance(archive.fp, BytesIO) is cached
+        assert util.session.cache.contains(url=url) is cached
+
+        # A cached archive is read from the cache.
+        tmpdir.join("standard.zip").remove()
+        if cached:
+            with closing(_resolve_zip(url, expire_after=NEVER_EXPIRE)) as archive:
+                assert archive.read("zip/schema/release-schema.json") == b"{}"
+    finally:
+        util.session.cache.delete(urls=[url])
+
+
 def arguments(**kwargs):
     data = {
         "Id": "location",